@@ -13,8 +13,8 @@ def define_app():
         name='main'
     )
 
-    class Stopwatch(Text):
-        DEFAULTATTRS= Text.DEFAULTATTRS
+    class Stopwatch(NumericText):
+        DEFAULTATTRS= NumericText.DEFAULTATTRS
 
         def __init__(self, *attrs, **kwargs):
             super().__init__(*attrs, **kwargs)
@@ -22,7 +22,7 @@ def define_app():
             self.start_time = None
             self.running = False
 
-        def draw(self, surface):
+        def refresh(self):
             if self.running:
                 total_seconds = time.time() - self.start_time + self.seconds_at_start
             else:
@@ -33,8 +33,10 @@ def define_app():
             seconds = str(int(total_seconds%60))
             if len(seconds) == 1:
                 seconds = '0' + seconds
-            self.update(message=minutes + ':' + seconds)
-            super().draw(surface)
+            if self.message != minutes + ':' + seconds:
+                self.update(message=minutes + ':' + seconds)
+            if self.running:
+                scheduler.wake_in(1 - total_seconds % 1)
 
         def reset(self):
             if self.running:
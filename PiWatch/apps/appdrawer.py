@@ -1,5 +1,4 @@
 from piwatch import *
-import copy
 
 
 def define_app():
@@ -11,28 +10,20 @@ def define_app():
         name='main'
     )
 
-    grid = Grid(
-        List.attributes,
-        children=[],
-        direction='down',
-        alignment='midtop',
-        padding=5,
-        position=('center', 0, 0),
-        spacing=5
-    )
+    rowsize = 3
 
     itemattrs = dict(
         List.attributes,
         direction='down',
         alignment='midtop',
         spacing=3,
-        padding=3
+        fixed_size=(96, 55)
     )
 
     iconattrs = dict(
-        Image.attributes,
-        size_x=32,
-        size_y=32
+        Icon.attributes,
+        filename=app.folder + "missing_icon.png",
+        size=32
     )
 
     textattrs = dict(
@@ -40,57 +31,68 @@ def define_app():
         size=15
     )
 
+    apps = {}  # name of the app -> its AppInfo, kept while the drawer is closed
+    app.names = []  # the names of the apps in the drawer, sorted
+
+    def make_row():
+        return List(
+            List.attributes,
+            children=[List(itemattrs, children=[Icon(iconattrs), Text(textattrs)]) for _ in range(rowsize)],
+            direction='right',
+            alignment='midtop',
+            position=('midtop', 0, 0),
+            spacing=5
+        )
+
+    def bind_row(row, index):
+        for column, item in enumerate(row.children):
+            position = index * rowsize + column
+            if position >= len(app.names):
+                item.update(visible=False)
+                continue
+            info = apps[app.names[position]]
+            icon, title = item.children
+            icon.update(filename=info.folder + info.icon if info.icon else app.folder + "missing_icon.png")
+            title.update(message=info.name or 'No Name')
+            item.update(visible=True)
+
+    drawer = RecyclerList(
+        size=(298, 210),
+        position=('midtop', 0, 30),
+        row_height=55,
+        spacing=5,
+        make_row=make_row,
+        bind_row=bind_row
+    )
+
+    @drawer.event_listener('tap')
+    def open_app(event):
+        location = drawer.locate(event.pos)
+        if not location:
+            return
+        index, pos = location
+        for column, item in enumerate(drawer.pool[0].children):
+            position = index * rowsize + column
+            if item.bg_rect.collidepoint(pos[0], item.bg_rect.centery) and position < len(app.names):
+                app.eventqueue.add('main start app', data=app.names[position])
+
     @app.event_listener('started app ' + app.name)
+    @app.event_listener('resumed app ' + app.name)
     def start(event):
         app.eventqueue.add(Event('main get variable', data='apps'))
 
     @app.event_listener('variable return')
     def got_apps(event):
-        rowsize = 3
-        apps = sorted(filter(lambda x: x.name != 'appdrawer', list(event.data[1].values())), key=lambda x: x.name)
-        rows = (apps[x:x+rowsize] for x in range(0, len(apps), rowsize))
-        rows_in_grid = []
-        for row in rows:
-            items_in_row = []
-            for _app in row:
-                if _app.icon:
-                    icon = Image(
-                        iconattrs,
-                        filename=_app.folder + _app.icon
-                    )
-                else:
-                    icon = Image(
-                        iconattrs,
-                        filename=app.folder + "missing_icon.png"
-                    )
-                if _app.name:
-                    title = Text(
-                        textattrs,
-                        message=_app.name
-                    )
-                else:
-                    title = Text(
-                        textattrs,
-                        message='No Name'
-                    )
-                item = List(
-                    itemattrs,
-                    children=[icon, title],
-                    app_to_start=_app.name,
-                )
-                items_in_row.append(item)
-            rows_in_grid.append(copy.deepcopy(items_in_row))
-        grid.clear()
-        grid.add(*rows_in_grid)
-
-    @app.event_listener('mouse up')
-    def mouse_up(event):
-        for row in grid.children:
-            for item in row:
-                if item.check_collision(event.pos):
-                    app_name = item.children[1].message
-                    app.eventqueue.add('main start app', data=app_name)
+        if event.data[0] != 'apps':
+            return
+        new_apps = {name: info for name, info in event.data[1].items() if name != 'appdrawer'}
+        if new_apps.keys() == apps.keys():
+            return
+        apps.clear()
+        apps.update(new_apps)
+        app.names = sorted(apps)
+        drawer.reload((len(app.names) + rowsize - 1) // rowsize)
 
-    main.add(grid)
+    main.add(drawer)
     app.add(main)
     return app
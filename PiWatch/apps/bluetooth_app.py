@@ -1,13 +1,11 @@
-import bluetooth
-import subprocess
-import sys
 from piwatch import *
 
-self_sock = None
+transport = None
 client_sock = None
-client_address = None
+send_queue = None
 abort_connection = False
 connection_active = False
+server_running = False
 
 
 def define_services():
@@ -16,44 +14,35 @@ def define_services():
     )
 
     def bt_clean_up():
-        global self_sock, client_sock, client_address, abort_connection, connection_active
-        if self_sock: self_sock.close()
-        if client_sock: client_sock.close()
-        self_sock, client_sock = None, None
+        global transport, client_sock, send_queue, abort_connection, connection_active, server_running
+        if send_queue: send_queue.close()
+        if transport: transport.close()
+        if client_sock: close_socket(client_sock)
+        transport, client_sock, send_queue = None, None, None
         abort_connection = False
         connection_active = False
+        server_running = False
 
     @service.event_listener('bt start rfcomm server')
-    @threaded
     def start_rfcomm_server(event):
-        """Starts a threaded RFCOMM server, which keeps listening
-            to incoming data."""
-        global client_sock, self_sock, abort_connection, connection_active
-        if sys.platform == 'linux':
-            # saves users the horrible pain of making their device discoverable
-            code = subprocess.call(['sudo', 'hciconfig', 'hci0', 'piscan'])
-            if not code:
-                print("enabled bluetooth")
-            else:
-                print("failed to enable bluetooth")
+        """Starts a threaded server on the transport in PIWATCH_BT_TRANSPORT (RFCOMM by default),
+            which keeps listening to incoming data. Ignored while a server is running."""
+        global server_running
+        if server_running:
+            print('bt server is already running')
+            return
+        server_running = True
+        run_rfcomm_server()
+
+    @threaded(pool=dedicated_threads)  # runs as long as the connection, so not on the worker pool
+    def run_rfcomm_server():
+        global client_sock, transport, send_queue, abort_connection, connection_active
         connection_active = True
-        self_sock = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
-        port = 0
         data_size = 1024
-        self_sock.bind(("", port))
-        self_sock.listen(1)
-
-        uuid = "bcfa2015-0e37-429b-8907-5b434f9b9093"
-        bt_service_name = "PiWatch Android Connection Service"
-        bluetooth.advertise_service(self_sock, bt_service_name,
-                                    service_id=uuid,
-                                    service_classes=[uuid, bluetooth.SERIAL_PORT_CLASS],
-                                    profiles=[bluetooth.SERIAL_PORT_PROFILE])
-        print("Advertising bt service: ", bt_service_name)
-
         try:
-            global client_address
-            client_sock, client_address = self_sock.accept()
+            transport = transport_from_env()
+            transport.listen()
+            client_sock, phone_name = transport.accept()
         except OSError:
             if abort_connection:
                 print('bt connection aborted')
@@ -67,46 +56,54 @@ def define_services():
             service.eventqueue.add(Event('bt connection failed'))
             bt_clean_up()
         else:
-            print("Accepted connection from ", client_address[0])
-            service.eventqueue.add(Event('bt connection active', data=bluetooth.lookup_name(client_address[0])))
+            service.eventqueue.add(Event('bt connection active', data=phone_name))
+            send_queue = SendQueue(message_sent, message_failed)
+            dedicated_threads.submit(send_queue.run, client_sock)  # the writer, for as long as the connection
+            send_queue.put('hello')
+            decoder = FrameDecoder()
             try:
-                client_sock.send("Hey There!")
                 while True:
-                    print(abort_connection)
                     data = client_sock.recv(data_size)
-                    if data:
-                        service.eventqueue.add(Event('bt data received', data=data))
-                        print("Received bluetooth data: " + str(data))
+                    if not data:
+                        break
+                    for payload in decoder.feed(data):
+                        try:
+                            message = decode_message(payload)
+                        except ProtocolError as error:
+                            print('Ignoring bluetooth message:', error)
+                            continue
+                        print('Received bluetooth message:', message)
+                        service.eventqueue.add(Event('bt message ' + message.kind, data=message))
+            except ProtocolError as error:
+                print('bt stream corrupted:', error)
             except:
                 pass
             finally:
                 bt_clean_up()
                 service.eventqueue.add(Event('bt connection aborted'))
 
+    def message_sent(message, seconds):
+        service.eventqueue.add(Event('bt send complete', data=(message, seconds)))
+
+    def message_failed(message, reason):
+        print('bt send failed:', reason)
+        service.eventqueue.add(Event('bt send failed', data=(message, reason)))
+
     @service.event_listener('bt abort connection')
     def abort_connection(event):
         print('Aborting connection')
         global abort_connection
         abort_connection = True
-        if self_sock:
-            self_sock.close()
+        if transport:
+            transport.close()
         if client_sock:
-            client_sock.close()
-
-    @service.event_listener('bt data received')
-    def send_notifications(event):
-        for thing in event.data.decode("utf-8").split("||"):
-            info = thing.split("|")
-            if info[0] == 'notification posted':
-                app = info[1].split(".")[1]
-                title = info[2]
-                text = info[3] if info[3] != 'null' else ""
-                service.eventqueue.add('main notification', data=[app, title, text])
+            close_socket(client_sock)
 
     @service.event_listener('bt discover')
     @threaded
     def discover_devices(event):
         print('Discovering Devices')
+        import bluetooth  # pybluez, only on the watch
         try:
             nearby_devices = bluetooth.discover_devices()
         except OSError:
@@ -121,12 +118,11 @@ def define_services():
 
     @service.event_listener('bt send')
     def send_bt_message(event):
-        if client_sock:
-            print('sending string:', event.data)
-            client_sock.send(event.data)
+        """Queue event.data (a Message or a string) for the writer thread of the connection."""
+        if send_queue:
+            send_queue.put(event.data)
         else:
-            print("bt send failed: No Connection")
-            service.eventqueue.add(Event('bt send failed'))
+            message_failed(event.data, 'not connected')
 
     return service
 
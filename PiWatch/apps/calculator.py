@@ -3,7 +3,6 @@ from piwatch import *
 # variables
 current_calc = ''
 answer = ''
-bttns = {}
 
 
 def define_app():
@@ -52,6 +51,36 @@ def define_app():
         padding=10
     )
 
+    def press(event):
+        global current_calc, answer
+        char = event.target.message
+        if char == '<':
+            current_calc = current_calc[:-1]
+        elif char == 'C':
+            current_calc = ''
+        elif char == '=':
+            if answer != 'division by zero':
+                current_calc = str(answer)
+        else:
+            current_calc += char
+        if len(current_calc) > 14:
+            calc_text = '...' + current_calc[int(len(current_calc)/14)*14-1:]
+        else:
+            calc_text = current_calc
+        calculation_text.update(message=calc_text)
+        try:
+            answer = eval(current_calc)
+            if type(answer) is float:
+                if answer % 1 == 0:
+                    answer = int(answer)
+                else:
+                    answer = round(answer, 10)
+        except SyntaxError:
+            pass
+        except ZeroDivisionError:
+            answer = 'division by zero'
+        answer_text.update(message=str(answer))
+
     @app.event_listener('started app {}'.format(app.name))
     def boot(event):
         char_list = ['789+<',
@@ -66,45 +95,12 @@ def define_app():
                     bttn_attrs,
                     message=char
                 )
-                bttns[bttn] = char
+                bttn.event_listener('tap')(press)
                 row.append(bttn)
             grid.append(row)
         bttn_grid.clear()
         bttn_grid.add(*grid)
 
-    @app.event_listener('mouse down')
-    def mouse_down(event):
-        global current_calc, answer
-        for button in bttns.keys():
-            if button.check_collision(event.pos):
-                char = bttns[button]
-                if char == '<':
-                    current_calc = current_calc[:-1]
-                elif char == 'C':
-                    current_calc = ''
-                elif char == '=':
-                    if answer != 'division by zero':
-                        current_calc = str(answer)
-                else:
-                    current_calc += char
-                if len(current_calc) > 14:
-                    calc_text = '...' + current_calc[int(len(current_calc)/14)*14-1:]
-                else:
-                    calc_text = current_calc
-                calculation_text.update(message=calc_text)
-                try:
-                    answer = eval(current_calc)
-                    if type(answer) is float:
-                        if answer % 1 == 0:
-                            answer = int(answer)
-                        else:
-                            answer = round(answer, 10)
-                except SyntaxError:
-                    pass
-                except ZeroDivisionError:
-                    answer = 'division by zero'
-                answer_text.update(message=str(answer))
-
     main.add(calculation_text, answer_text, bttn_grid)
     app.add(main)
     return app
\ No newline at end of file
@@ -10,14 +10,15 @@ def define_overlay():
         name='main'
     )
 
-    fps_counter = Text(
+    fps_counter = NumericText(
         position=('topleft', 0, 0),
         size=15
     )
 
     @overlay.event_listener('new frame')
     def new_frame(event):
-        fps_counter.update(message=str(event.data))
+        if fps_counter.message != str(event.data):
+            fps_counter.update(message=str(event.data))
 
     main.add(fps_counter)
     overlay.add(main)
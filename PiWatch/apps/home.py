@@ -123,7 +123,7 @@ def text_time(time_obj):
         return int_to_word(minutes) + ' past ' + hour_str
 
 
-class FunClock(Text):
+class FunClock(NumericText):
     DEFAULTATTRS = dict(
         Clock.DEFAULTATTRS,
         state=NORMAL,
@@ -171,7 +171,7 @@ class FunClock(Text):
                 kwargs['size'] = 27
         super().update(**kwargs)
 
-    def draw(self, surface):
+    def refresh(self):
         if self.state == NORMAL:
             if self.time != time.localtime()[3:5]:
                 self.update(message=self.normal_message())
@@ -184,7 +184,8 @@ class FunClock(Text):
         elif self.state == TEXT:
             if self.time != time.localtime()[3:5]:
                 self.update(message=text_time(time.localtime()))
-        super().draw(surface)
+        if self.state != NOW:
+            scheduler.wake_at(next_minute())
 
 
 def define_app():
@@ -2,10 +2,13 @@ from piwatch import *
 import random
 
 running = False
-rows = 10
-columns = 7
+rows = 7
+columns = 10
 amount_of_mines = 15
-exclude_position = None
+mines = []
+COVERED = 0
+EXPLODED = 1
+UNCOVERED = 2  # UNCOVERED + n is an uncovered field with n mines around it
 
 
 def define_app():
@@ -18,15 +21,16 @@ def define_app():
         name='main'
     )
 
-    field_attrs = dict(
-        Text.attributes,
-        message='',
-        bg_color=(200, 200, 210),
-        fixed_size=28
-    )
+    palette = {COVERED: (200, 200, 210), EXPLODED: (Color.RED, 'X'), UNCOVERED: Color.BLACK}
+    for number in range(1, 9):
+        palette[UNCOVERED + number] = (Color.BLACK, str(number))
 
-    board = Grid(
+    board = TileMap(
+        columns=columns,
+        rows=rows,
+        tile_size=28,
         spacing=3,
+        palette=palette,
         position=('midbottom', 0, -3)
     )
 
@@ -56,101 +60,50 @@ def define_app():
         """Creates a grid of mines and numbers in fields indicating the number of mines around them.
             -1 = mine
             0-8 = no mine"""
-        all_possible_positions = ((iii, jjj) for jjj in range(size_x) for iii in range(size_y))
-        mine_positions = random.sample(list(filter(lambda pos: pos != tuple(reversed(exclude_pos)), all_possible_positions)), num_mines)
+        all_possible_positions = ((x, y) for y in range(size_y) for x in range(size_x))
+        mine_positions = random.sample(list(filter(lambda pos: pos != exclude_pos, all_possible_positions)), num_mines)
         grid = []
-        for row_num in range(size_x):
+        for y in range(size_y):
             row = []
-            for column_num in range(size_y):
-                if (column_num, row_num) in mine_positions:
+            for x in range(size_x):
+                if (x, y) in mine_positions:
                     # -1 is a mine
                     row.append(-1)
                 else:
-                    row.append(0)
-            grid.append(row)
-        for row in range(size_x):
-            for column in range(size_y):
-                if (column, row) not in mine_positions:
                     neighbours = 0
                     for iii in [-1, 0, 1]:
                         for jjj in [-1, 0, 1]:
-                            neighbours += 1 if (column + iii, row + jjj) in mine_positions else 0
-                    grid[row][column] = neighbours
+                            neighbours += 1 if (x + iii, y + jjj) in mine_positions else 0
+                    row.append(neighbours)
+            grid.append(row)
         return grid
 
-    @app.event_listener('mouse up')
-    def mouse_down(event):
-        global running, exclude_position
+    def uncover(x, y):
+        """Uncovers field (x, y), returns False if it was a mine."""
+        if mines[y][x] == -1:
+            board.set_tile(x, y, EXPLODED)
+            return False
+        board.set_tile(x, y, UNCOVERED + mines[y][x])
+        return True
+
+    @board.event_listener('tap')
+    def tap(event):
+        global running, mines
+        field = board.tile_at(event.pos)
+        if field is None:
+            return
         if not running:
-            exit_loop = False
-            for index_1, row in enumerate(board.children):
-                for index_2, field in enumerate(row):
-                    if field.check_collision(event.pos):
-                        exclude_position = (index_1, index_2)
-                        exit_loop = True
-                        break
-                if exit_loop:
-                    break
-            if not exit_loop:
-                return
-            num_grid = generate_grid(columns, rows, amount_of_mines, exclude_position)
-            grid = []
-            for num_row in num_grid:
-                row = []
-                for num_field in num_row:
-                    field = Text(
-                        field_attrs,
-                        num=num_field,
-                        uncovered=False
-                    )
-                    row.append(field)
-                grid.append(row)
-            board.clear()
-            board.add(*grid)
-            excluded_field = board.children[exclude_position[0]][exclude_position[1]]
-            if excluded_field.num == 0:
-                excluded_field.update(
-                    bg_color=Color.BLACK,
-                    uncovered=True
-                )
-            else:
-                excluded_field.update(
-                    message=str(excluded_field.num),
-                    bg_color=Color.BLACK,
-                    uncovered=True
-                )
-            board.update()
+            mines = generate_grid(columns, rows, amount_of_mines, field)
+            board.fill(COVERED)
+            uncover(*field)
             running = True
             vic_text.update(visible=False)
-        else:
-            for field in filter(lambda x: x.message == '', board.flat_children):
-                if field.check_collision(event.pos):
-                    if field.num == -1:
-                        field.update(
-                            message='X',
-                            bg_color=Color.RED)
-                        running = False
-                        break
-                    elif field.num == 0:
-                        field.update(
-                            bg_color=Color.BLACK,
-                            uncovered=True
-                        )
-                    else:
-                        field.update(
-                            message=str(field.num),
-                            bg_color=Color.BLACK,
-                            uncovered=True)
-                    print(len(list(board.flat_children)))
-                    print(rows*columns - len(list(filter(lambda x: x.uncovered, board.flat_children))))
-                    if len(list(board.flat_children)) - len(list(filter(lambda x: x.uncovered, board.flat_children))) == amount_of_mines:
-                        running = False
-                        vic_text.update(visible=True)
-                    break
-            board.update()
-
-    board.children = []
-    board.add(*[[Text(field_attrs, num=0) for _ in range(rows)] for _ in range(columns)])
+        elif board.get_tile(*field) == COVERED:
+            if not uncover(*field):
+                running = False
+            elif board.tiles.count(COVERED) == amount_of_mines:
+                running = False
+                vic_text.update(visible=True)
 
     main.add(board, vic_text)
     app.add(main)
@@ -16,10 +16,43 @@ def define_app():
     )
     loadscreen.add(load_text)
 
-    notification_list = List(
+    app.rendered_version = None
+    app.shown = []  # the notifications in the list, newest first
+
+    def make_row():
+        return List(
+            alignment="topleft",
+            position=("topleft", 0, 0),
+            bg_color=(200, 200, 200),
+            fixed_size=(280, 55),
+            children=[
+                Text(
+                    color=(0, 0, 0),
+                    size=16,
+                    padding=(6, 5)
+                ),
+                Paragraph(
+                    color=(0, 0, 0),
+                    size=14,
+                    padding=(6, 3),
+                    width=268,
+                    max_lines=2
+                )
+            ]
+        )
+
+    def bind_row(row, index):
+        notification = app.shown[index]
+        row.children[0].update(message=notification.title)
+        row.children[1].update(message=notification.text)
+
+    notification_list = RecyclerList(
         position=("topleft", 20, 25),
-        alignment="topleft",
-        spacing=5
+        size=(280, 215),
+        row_height=55,
+        spacing=5,
+        make_row=make_row,
+        bind_row=bind_row
     )
 
     list_screen = Activity(
@@ -30,48 +63,22 @@ def define_app():
     @app.event_listener('started app Notifications')
     @app.event_listener('resumed app Notifications')
     def get_notifications(event):
+        """Show the stored notifications right away and ask the phone for the ones that are new."""
         load_text.update(message="Receiving Notifications...")
-        app.eventqueue.add('bt send', data="list notifications")
+        list_notifications(event)
+        app.eventqueue.add('sync notifications')
 
     @app.event_listener('bt send failed')
     def not_connected(event):
         load_text.update(message="Not connected.")
 
-    @app.event_listener('bt data received')
+    @app.event_listener('notifications changed')
     def list_notifications(event):
-        info = event.data.decode("utf-8").split("||")
-        if info[0] != "notification list": return
-        if len(info) > 5: list = info[1:6]
-        else: list = info[1:]
-
-        notification_list.clear()
-        itemlist = []
-        for notification in list:
-            app_str, title_str, text_str = notification.split("|")
-
-            itemlist.append(
-                List(
-                    alignment="topleft",
-                    bg_color=(200, 200, 200),
-                    fixed_size=(280, 37),
-                    children=[
-                        Text(
-                            color=(0, 0, 0),
-                            message=title_str,
-                            size=16,
-                            padding=(6, 5)
-                        ),
-                        Text(
-                            color=(0, 0, 0),
-                            message=text_str,
-                            size=14,
-                            padding=(6, 3)
-                        )
-                    ]
-                )
-            )
-
-        notification_list.add(*itemlist)
+        if app.rendered_version == notifications.version or not len(notifications):
+            return
+        app.rendered_version = notifications.version
+        app.shown = notifications.query()
+        notification_list.reload(len(app.shown))
         app.set_activity("list")
 
     app.add(loadscreen, list_screen)
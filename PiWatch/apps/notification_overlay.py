@@ -1,4 +1,3 @@
-import time
 from piwatch import *
 
 
@@ -12,17 +11,20 @@ def define_overlay():
         size=25,
     )
 
-    text = Text(
+    text = Paragraph(
         color=(255, 255, 255),
-        size=20,
+        size=18,
+        width=230,
+        max_lines=2,
+        align='center'
     )
     notification = List(
         children=[title, text],
         bg_color=(50, 50, 50, 230),
-        fixed_size=(250, 55),
+        fixed_size=(250, 85),
         direction='down',
         alignment='center',
-        spacing=10,
+        spacing=4,
         position=('midtop', 0, 20)
     )
 
@@ -33,19 +35,27 @@ def define_overlay():
     empty = Activity(
         name='empty'
     )
-    app.thread_count = 0
+    app.hide_timer = None
 
     @app.event_listener('notification')
-    @threaded
     def display_notification(event):
-        app.thread_count += 1
         title.update(message=event.data[1])
         text.update(message=event.data[2])
+        if app.hide_timer is None and notification.alpha == 255:  # hidden, not fading out
+            notification.transform((0, -110), 0)
         app.set_activity('main')
-        time.sleep(3)
-        if app.thread_count == 1:
-            app.set_activity('empty')
-        app.thread_count -= 1
+        animate(notification, offset=(0, 0), alpha=255, duration=0.25)
+        app.cancel(app.hide_timer)
+        app.hide_timer = app.schedule(3, 'hide notification')
+
+    @app.event_listener('hide notification')
+    def hide_notification(event):
+        app.hide_timer = None
+        animate(notification, offset=(0, -110), alpha=0, duration=0.25, easing='ease-in', then=hidden)
+
+    def hidden():
+        app.set_activity('empty')
+        notification.transform()
 
     main.add(notification)
     app.add(main, empty)
@@ -0,0 +1,40 @@
+from piwatch import *
+import os
+import time
+
+
+def define_services():
+    service = Service(
+        name='notification store'
+    )
+
+    @service.event_listener('started service notification store')
+    def open_store(event):
+        if notifications.path is None:  # else it was opened before the PiWatch booted, e.g. by a benchmark
+            notifications.open(os.path.join('apps', '.notifications.jsonl'))
+        print(len(notifications), 'notifications stored.')
+
+    @service.event_listener('bt message notification posted')
+    def store_notification(event):
+        posted = event.data
+        text = posted.text if posted.text != 'null' else ""
+        service.eventqueue.add('main notification', data=[posted.app, posted.title, text])
+        if notifications.add(posted.app, posted.title, text):  # a repeat is shown, but stored once
+            service.eventqueue.add('notifications changed')
+
+    @service.event_listener('bt message notification list')
+    def store_notification_list(event):
+        """The phone sends the notifications posted since the last list it sent, or all of them."""
+        notifications.synced_at = time.time()
+        added = [notifications.add(app, title, text if text != 'null' else "")
+                 for app, title, text in reversed(event.data.notifications)]
+        if any(added):
+            service.eventqueue.add('notifications changed')
+
+    @service.event_listener('sync notifications')
+    def sync(event):
+        """Ask the phone for the notifications posted since the last sync."""
+        since = notifications.synced_at
+        service.eventqueue.add('bt send', data=Message('list notifications', *([repr(since)] if since else [])))
+
+    return service
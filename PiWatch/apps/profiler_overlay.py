@@ -0,0 +1,64 @@
+"""Shows the time spent in each phase of the last frames, see piwatch.profiler."""
+import time
+
+import pygame
+
+from piwatch import *
+
+
+class FrameGraph(Drawable):
+    """Bar graph of the recorded frames, one bar per frame with the time of each phase stacked.
+    The line is the budget of a frame at 15 fps. Redrawn at most every 'interval' seconds.
+    """
+    DEFAULTATTRS = dict(
+        Drawable.DEFAULTATTRS,
+        bar_width=2,
+        height=72,
+        scale=1,  # pixels per millisecond
+        interval=0.5,
+        bg_color=(0, 0, 0, 160),
+        position=('bottomleft', 0, 0)
+    )
+
+    def __init__(self, *attrs, **kwargs):
+        super().__init__(*attrs, **kwargs)
+        self.rendered_at = 0
+
+    def render_image(self):
+        self.rendered_at = time.time()
+        self.image = pygame.Surface((profiler.frames.maxlen * self.bar_width, self.height), pygame.SRCALPHA)
+        for index, frame in enumerate(profiler.frame_totals()):
+            bottom = self.height
+            for category, color in CATEGORIES.items():
+                height = round(frame[category] * self.scale)
+                if height:
+                    self.image.fill(color, (index * self.bar_width, bottom - height, self.bar_width, height))
+                    bottom -= height
+        budget = self.height - round(FRAME_BUDGET_MS * self.scale)
+        if budget >= 0:
+            self.image.fill((255, 255, 255), (0, budget, self.image.get_width(), 1))
+
+    def refresh(self):
+        if time.time() - self.rendered_at >= self.interval:
+            self.update()
+        scheduler.wake_at(self.rendered_at + self.interval)
+
+
+def define_overlay():
+    overlay = Overlay(
+        name='profiler'
+    )
+
+    main = Activity(
+        name='main'
+    )
+
+    graph = FrameGraph()
+
+    @overlay.event_listener('started overlay profiler')
+    def start_profiling(event):
+        profiler.enabled = True
+
+    main.add(graph)
+    overlay.add(main)
+    return overlay
@@ -1,13 +1,10 @@
 import random
 
-import itertools
-
 from piwatch import *
-import time
 
 seconds_till_frame = 0.15
 score = 0
-time_prev_frame = time.time()
+step_timer = None
 snake = []
 rows = 13
 columns = 20
@@ -20,6 +17,9 @@ direction = 'right'
 snake_color = (255, 255, 255)
 goal_color = (50, 50, 255)
 board_color = (0, 0, 0)
+EMPTY = 0
+SNAKE = 1
+GOAL = 2
 running = True
 goal = None
 
@@ -34,16 +34,11 @@ def define_app():
         name='main'
     )
 
-    box_attrs = dict(
-        Text.attributes,
-        message='',
-        size=1,
-        fixed_size=box_size,
-        bg_color=board_color,
-    )
-
-    board = Grid(
-        children=[[Text(box_attrs) for _ in range(columns)] for _ in range(rows)],
+    board = TileMap(
+        columns=columns,
+        rows=rows,
+        tile_size=box_size,
+        palette={EMPTY: board_color, SNAKE: snake_color, GOAL: goal_color},
         spacing=1,
         position=('center', 0, 10),
         bg_color=(30, 30, 30)
@@ -78,32 +73,41 @@ def define_app():
             point = (random.randint(0, columns-1), random.randint(0, rows-1))
         return point
 
+    def start_stepping():
+        global step_timer
+        app.cancel(step_timer)
+        step_timer = app.every(seconds_till_frame, 'snake step')
+
     @app.event_listener('started app {}'.format(app.name))
     def reset(event):
-        global snake, time_prev_frame, running, direction, score, goal
+        global snake, running, direction, score, goal
         running = True
         direction = RIGHT
         score = 0
-        time_prev_frame = time.time()
-        if snake:
-            for x, y in snake:
-                board.children[y][x].update(bg_color=board_color)
-        if goal:
-            board.children[goal[1]][goal[0]].update(bg_color=board_color)
+        start_stepping()
+        board.fill(EMPTY)
         snake = [(int(columns/2)-1, int(rows/2)), (int(columns/2), int(rows/2))]
         for x, y in snake:
-            board.children[y][x].update(bg_color=snake_color)
+            board.set_tile(x, y, SNAKE)
         goal = generate_goal()
-        board.children[goal[1]][goal[0]].update(bg_color=goal_color)
-        board.update()
+        board.set_tile(*goal, GOAL)
         game_over.update(visible=False)
         try_again.update(visible=False)
         score_text.update(visible=False)
 
-    @app.event_listener('new frame')
-    def frame(event):
-        global time_prev_frame, running, goal, score
-        if running and time.time() - time_prev_frame >= seconds_till_frame:
+    @app.event_listener('resumed app {}'.format(app.name))
+    def resume(event):
+        if running:
+            start_stepping()
+
+    @app.event_listener('closed app {}'.format(app.name))
+    def pause(event):
+        app.cancel(step_timer)
+
+    @app.event_listener('snake step')
+    def step(event):
+        global running, goal, score
+        if running:
 
             # Calculate which box has to be added to the snake
             if direction == LEFT:
@@ -119,17 +123,18 @@ def define_app():
 
             # Check whether snake touches a green box. If so, the snake will grow
             if new == goal:
-                board.children[goal[1]][goal[0]].update(bg_color=board_color)
+                board.set_tile(*goal, EMPTY)
                 goal = generate_goal()
-                board.children[goal[1]][goal[0]].update(bg_color=goal_color)
+                board.set_tile(*goal, GOAL)
                 score += 1
             else:
                 last = snake.pop(0)
-                board.children[last[1]][last[0]].update(bg_color=board_color)
+                board.set_tile(*last, EMPTY)
 
             # Check game over conditions
             if new[0] < 0 or new[0] >= columns or new[1] < 0 or new[1] >= rows or new in snake:
                 running = False
+                app.cancel(step_timer)
                 game_over.update(visible=True)
                 try_again.update(visible=True)
                 score_text.update(
@@ -137,9 +142,7 @@ def define_app():
                     visible=True)
             else:
                 snake.append(new)
-                board.children[new[1]][new[0]].update(bg_color=snake_color)
-                time_prev_frame = time.time()
-            board.update()
+                board.set_tile(*new, SNAKE)
 
     @app.event_listener('mouse down')
     def mouse_down(event):
@@ -0,0 +1,4 @@
+"""Headless benchmarks for the PiWatch. Run them from the PiWatch directory, e.g.:
+    python3 -m benchmarks.alpha_tint
+benchmarks.run runs all bundled apps and can compare the results to a saved baseline.
+"""
@@ -0,0 +1,49 @@
+"""Compares the per pixel alpha tint loop with the bulk implementation in Drawable."""
+from benchmarks import headless  # must come before pygame and piwatch
+import timeit
+
+import pygame
+
+from piwatch.drawable import tint_alpha
+
+
+def tint_alpha_pixelwise(image, alpha):
+    """The original implementation of Drawable.create_fg_surf."""
+    surface = image.copy()
+    pixelarray = pygame.PixelArray(surface)
+    for x in range(image.get_width()):
+        for y in range(image.get_height()):
+            pixel = image.unmap_rgb(pixelarray[x, y])
+            if not pixel[3] == 0:
+                pixelarray[x, y] = image.map_rgb(pixel[:3] + (int(pixel[3] * alpha / 255),))
+    del pixelarray
+    return surface
+
+
+def sample_surface(width, height):
+    surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+    for x in range(width):
+        for y in range(height):
+            surface.set_at((x, y), (x * 7 % 256, y * 13 % 256, (x + y) % 256, (x * y) % 256))
+    return surface
+
+
+def same_pixels(a, b):
+    return all(a.get_at((x, y)) == b.get_at((x, y)) for x in range(a.get_width()) for y in range(a.get_height()))
+
+
+def main():
+    print('{:>10} {:>14} {:>14} {:>8}'.format('size', 'pixelwise ms', 'bulk ms', 'speedup'))
+    for width, height in ((16, 16), (64, 32), (180, 36), (320, 240)):
+        image = sample_surface(width, height)
+        for alpha in (0, 1, 150, 254):
+            assert same_pixels(tint_alpha_pixelwise(image, alpha), tint_alpha(image, alpha)), (width, height, alpha)
+        number = 3 if width * height > 10000 else 20
+        old = min(timeit.repeat(lambda: tint_alpha_pixelwise(image, 150), number=number, repeat=3)) / number
+        new = min(timeit.repeat(lambda: tint_alpha(image, 150), number=number, repeat=3)) / number
+        print('{:>10} {:>14.3f} {:>14.3f} {:>7.0f}x'.format(
+            '{}x{}'.format(width, height), old * 1000, new * 1000, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Time of a frame of an animation of a List, compared to moving it by updating its position."""
+from benchmarks import headless  # must come before pygame and piwatch
+import itertools
+import timeit
+
+import pygame
+
+from piwatch import List, Text
+from piwatch.animation import Animator
+
+
+def make_banner(parent):
+    banner = List(position=('midtop', 0, 0), alignment='midtop', bg_color=(40, 40, 40), fixed_size=(250, 55),
+                  children=[Text(size=22, message='Alice'), Text(size=18, message='See you at 8?')])
+    banner.setup(parent)
+    return banner
+
+
+def main():
+    parent = pygame.Surface((320, 240))
+    animated = make_banner(parent)
+    updated = make_banner(parent)
+    animator = Animator()
+    clock = itertools.count(0, 0.01)
+    ys = itertools.cycle(range(-80, 1, 4))
+
+    def animation_frame():
+        if not animator.active:
+            animator.animate(animated, offset=(0, -80) if animated.offset == (0, 0) else (0, 0),
+                             alpha=0 if animated.alpha == 255 else 255, duration=0.2)
+        animator.step(next(clock))
+        animated.composite(parent)
+
+    def update_frame():
+        updated.update(position=('midtop', 0, next(ys)))
+        updated.draw(parent)
+
+    number = 500
+    print('{:>28} {:>10}'.format('', 'us'))
+    for name, func in (('animate offset and alpha', animation_frame), ('update position', update_frame)):
+        seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print('{:>28} {:>10.1f}'.format(name, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
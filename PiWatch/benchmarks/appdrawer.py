@@ -0,0 +1,50 @@
+"""Time the appdrawer takes to handle the app list when it opens: the first time, when it is
+opened again with the same apps and when one app was added since.
+"""
+from benchmarks import headless  # must come before pygame and piwatch
+import importlib.machinery
+import timeit
+
+from piwatch import AppInfo, AppManifest, Event, assets
+
+
+def define_drawer():
+    module = importlib.machinery.SourceFileLoader('appdrawer', 'apps/appdrawer.py').load_module()
+    drawer = module.define_app()
+    drawer.start(headless.screen)
+    return drawer
+
+
+def give_apps(drawer, apps):
+    for func in drawer.get_event_listeners()['variable return']:
+        func(Event('variable return', data=('apps', apps)))
+
+
+def main():
+    apps = AppManifest('apps').load().names('apps')
+    more_apps = dict(apps, Extra=AppInfo('Extra'))
+    drawer = define_drawer()
+    give_apps(drawer, apps)
+    toggle = [False]
+
+    def first_open():
+        assets.clear()
+        give_apps(define_drawer(), apps)
+
+    def add_and_remove():
+        toggle[0] = not toggle[0]
+        give_apps(drawer, more_apps if toggle[0] else apps)
+
+    number = 20
+    print('{:>32} {:>10}'.format('', 'us'))
+    for name, func in (('first open, nothing cached', first_open),
+                       ('reopen, one app added/removed', add_and_remove),
+                       ('reopen, same apps', lambda: give_apps(drawer, apps))):
+        seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print('{:>32} {:>10.1f}'.format(name, seconds * 1e6))
+    drawer.draw(headless.screen)
+    print(assets.stats())
+
+
+if __name__ == '__main__':
+    main()
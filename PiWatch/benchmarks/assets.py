@@ -0,0 +1,47 @@
+"""Time of swapping the camera button image and of blitting it, loading from disk versus the asset cache."""
+from benchmarks import headless  # must come before pygame and piwatch
+import timeit
+
+import pygame
+
+from piwatch import Image, assets
+
+BUTTONS = ['apps/camera/bttn.png', 'apps/camera/bttn2.png']
+
+
+def load_like_before(filename):
+    """What Image.update(filename=...) did before the asset cache: load without converting."""
+    return pygame.image.load(filename)
+
+
+def main():
+    screen = headless.screen
+    button = Image(filename=BUTTONS[0])
+    button.setup(screen)
+    index = [0]
+
+    def swap():
+        index[0] ^= 1
+        button.update(filename=BUTTONS[index[0]])
+
+    def swap_like_before():
+        index[0] ^= 1
+        button.file = load_like_before(BUTTONS[index[0]])
+        button.image = pygame.transform.scale(button.file, button.file.get_size())
+
+    number = 200
+    print('{:>32} {:>10}'.format('', 'us'))
+    for name, func in (('swap image, load from disk', swap_like_before),
+                       ('swap image, asset cache', swap)):
+        seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print('{:>32} {:>10.1f}'.format(name, seconds * 1e6))
+    unconverted = load_like_before(BUTTONS[0])
+    converted = assets.load(BUTTONS[0])
+    for name, surface in (('blit, not converted', unconverted), ('blit, converted', converted)):
+        seconds = min(timeit.repeat(lambda: screen.blit(surface, (0, 0)), number=number, repeat=3)) / number
+        print('{:>32} {:>10.1f}'.format(name, seconds * 1e6))
+    print(assets.stats())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Boot time of the PiWatch with a cached app manifest, without one, and when every app is defined at boot."""
+import json
+import os
+import subprocess
+import sys
+
+# runs in a fresh interpreter for every measurement, so no module is imported yet
+CHILD = '''
+from benchmarks import headless
+import json, sys, time
+sys.argv = ['main.py', '-d']
+start = time.perf_counter()
+import main
+main.boot()
+if {eager}:
+    # what the PiWatch did before the manifest: define everything before the first frame
+    for kind in ('apps', 'overlays', 'services'):
+        for name in main.manifest.names(kind):
+            main.define(kind, name)
+print('RESULT', json.dumps(time.perf_counter() - start))
+'''
+
+
+def measure(eager=False, cold=False):
+    if cold and os.path.exists(os.path.join('apps', '.manifest.json')):
+        os.remove(os.path.join('apps', '.manifest.json'))
+    output = subprocess.run([sys.executable, '-c', CHILD.format(eager=eager)], stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, universal_newlines=True, check=True).stdout
+    return json.loads(output.split('RESULT', 1)[1])
+
+
+def main():
+    repeat = 5
+    cases = (('define every app at boot', dict(eager=True)),
+             ('lazy, no manifest cached', dict(cold=True)),
+             ('lazy, manifest cached', dict()))
+    print('{:>28} {:>10} {:>10}'.format('', 'best s', 'mean s'))
+    for name, kwargs in cases:
+        times = [measure(**kwargs) for _ in range(repeat)]
+        print('{:>28} {:>10.3f} {:>10.3f}'.format(name, min(times), sum(times) / repeat))
+
+
+if __name__ == '__main__':
+    main()
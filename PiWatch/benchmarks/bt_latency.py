@@ -0,0 +1,95 @@
+"""Notification latency (phone sends -> notification overlay drawn) and throughput of the phone link,
+with a fake phone on a Unix domain socket in place of Bluetooth.
+
+    python3 -m benchmarks.bt_latency [--notifications N] [--burst N] [--paced]
+
+Without --paced the frames run back to back, so the latency is that of the event pipeline;
+with --paced they run at the 15 fps of the watch.
+"""
+from benchmarks import headless  # must come before pygame and piwatch
+import argparse
+import contextlib
+import os
+import statistics
+import threading
+import time
+
+from benchmarks.phone import FakePhone
+from benchmarks.run import load_main, percentile
+from piwatch.transport import TRANSPORT_VARIABLE
+
+
+def run_frame(main, paced):
+    if paced:
+        main.frame()
+    else:
+        main.dispatch_events()
+        main.refresh()
+        main.draw()
+
+
+def run_until(main, paced, done, timeout=10):
+    """Run frames until done() is true after a frame was drawn, return the frames it took."""
+    deadline = time.perf_counter() + timeout
+    frames = 0
+    while not done():
+        if time.perf_counter() > deadline:
+            raise TimeoutError('gave up after {} frames'.format(frames))
+        run_frame(main, paced)
+        frames += 1
+    return frames
+
+
+def shown_title(main):
+    overlay = main.overlays.get('notification')
+    if overlay not in main.current_overlays or overlay.current_activity.name != 'main':
+        return None
+    return overlay.current_activity.objects[0].children[0].message
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notifications', type=int, default=50, help='notifications sent one at a time')
+    parser.add_argument('--burst', type=int, default=500, help='notifications sent at once')
+    parser.add_argument('--paced', action='store_true', help='run the frames at 15 fps')
+    args = parser.parse_args()
+    os.environ[TRANSPORT_VARIABLE] = 'unix:/tmp/piwatch-bench-{}.sock'.format(os.getpid())
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):  # the watch prints every message
+        main = load_main(dirty=False)
+        main.main_eventqueue.add('bt start rfcomm server')
+        phone = FakePhone()
+        threading.Thread(target=phone.connect, daemon=True).start()
+        run_until(main, args.paced, phone.connected.is_set)
+
+        latencies, frames = [], []
+        for index in range(args.notifications):
+            title = 'Latency {}'.format(index)
+            sent = time.perf_counter()
+            phone.post_notification(title, 'from the fake phone')
+            frames.append(run_until(main, args.paced, lambda: shown_title(main) == title))
+            latencies.append((time.perf_counter() - sent) * 1000)
+
+        shown = []
+        main.overlays['notification'].event_listener('notification')(lambda event: shown.append(event.data))
+        titles = ['Burst {}'.format(index) for index in range(args.burst)]
+        sent = time.perf_counter()
+        for title in titles:
+            phone.post_notification(title, 'x' * 100)
+        burst_frames = run_until(main, args.paced, lambda: len(shown) == args.burst, timeout=60)
+        seconds = time.perf_counter() - sent
+        phone.close()
+        main.main_eventqueue.add('bt abort connection')
+        run_frame(main, args.paced)
+
+    assert [data[1] for data in shown] == titles, 'notifications were lost or reordered'
+    print('{} notifications one at a time, {}'.format(args.notifications, 'paced' if args.paced else 'unpaced'))
+    print('  latency ms: p50 {:.2f}  p90 {:.2f}  max {:.2f}  mean {:.2f}'.format(
+        percentile(latencies, 50), percentile(latencies, 90), max(latencies), statistics.mean(latencies)))
+    print('  frames from send to drawn: {}-{}'.format(min(frames), max(frames)))
+    print('{} notifications at once: all shown after {:.1f} ms in {} frames, {:.0f} notifications/s'.format(
+        args.burst, seconds * 1000, burst_frames, args.burst / seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Frame times while the watch sends to a phone that stopped reading, and the send latency once
+it reads again. Uses the fake phone on a Unix domain socket in place of Bluetooth.
+
+    python3 -m benchmarks.bt_send [--frames N] [--per-frame N] [--size BYTES]
+"""
+from benchmarks import headless  # must come before pygame and piwatch
+import argparse
+import contextlib
+import os
+import threading
+import time
+
+from benchmarks.bt_latency import run_frame, run_until
+from benchmarks.phone import FakePhone
+from benchmarks.run import load_main, percentile
+from piwatch import Event, Message
+from piwatch.transport import TRANSPORT_VARIABLE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frames', type=int, default=100, help='frames while the phone does not read')
+    parser.add_argument('--per-frame', type=int, default=20, help='messages sent every frame')
+    parser.add_argument('--size', type=int, default=2000, help='bytes per message')
+    args = parser.parse_args()
+    os.environ[TRANSPORT_VARIABLE] = 'unix:/tmp/piwatch-bench-{}.sock'.format(os.getpid())
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        main = load_main(dirty=False)
+        main.main_eventqueue.add('bt start rfcomm server')
+        phone = FakePhone()
+        threading.Thread(target=phone.connect, daemon=True).start()
+        run_until(main, False, phone.connected.is_set)
+        service = main.services['bluetooth service']
+        completed, failed = [], []
+        service.event_listener('bt send complete')(lambda event: completed.append(event.data[1]))
+        service.event_listener('bt send failed')(lambda event: failed.append(event.data[1]))
+        send_queue = main.modules['bluetooth_app'].send_queue
+
+        phone.reading.clear()
+        frame_times = []
+        for frame in range(args.frames):
+            for index in range(args.per_frame):
+                main.main_eventqueue.add(Event('bt send', data=Message('log', str(frame * args.per_frame + index),
+                                                                       'x' * args.size)))
+            start = time.perf_counter()
+            run_frame(main, False)
+            frame_times.append((time.perf_counter() - start) * 1000)
+        stalled = dict(send_queue.stats(), completed=len(completed), failed=len(failed))
+
+        for _ in range(10):
+            main.main_eventqueue.add('bt send', data='list notifications')
+        run_frame(main, False)
+        coalesced = send_queue.stats()['coalesced']
+
+        completed.clear()
+        phone.reading.set()
+        run_until(main, False, lambda: not send_queue.stats()['queued'] and completed, timeout=30)
+        for _ in range(5):
+            run_frame(main, False)
+        phone.close()
+        main.main_eventqueue.add('bt abort connection')
+        run_frame(main, False)
+
+    sent = args.frames * args.per_frame
+    print('{} messages of {} bytes while the phone does not read'.format(sent, args.size))
+    print('  frame ms: p50 {:.2f}  p99 {:.2f}  max {:.2f}'.format(
+        percentile(frame_times, 50), percentile(frame_times, 99), max(frame_times)))
+    print('  sent {completed}, dropped {failed} (queue full), still queued {queued}'.format(**stalled))
+    print('10 equal messages queued in one frame: {} coalesced'.format(coalesced))
+    latencies = [seconds * 1000 for seconds in completed]
+    print('after the phone reads again: {} sent, latency ms p50 {:.1f}  max {:.1f}'.format(
+        len(latencies), percentile(latencies, 50), max(latencies)))
+
+
+if __name__ == '__main__':
+    main()
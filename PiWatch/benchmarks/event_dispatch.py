@@ -0,0 +1,71 @@
+"""Events per second through Eventqueue.broadcast() for N targets and M tags."""
+from benchmarks import headless  # must come before pygame and piwatch
+import time
+
+from piwatch import App, Activity, Event, Eventqueue, Service
+
+
+def get_event_listeners_copying(target):
+    """The original App.get_event_listeners, which merges both dicts on every call."""
+    if not isinstance(target, App):
+        return target.get_event_listeners()
+    d1 = target.event_listeners.copy()
+    for key, value in target.current_activity.get_event_listeners().items():
+        d1[key] = d1[key] + value if key in d1 else value
+    return d1
+
+
+def broadcast_linear(queue, *targets):
+    """The original broadcast, which asks every target for its listeners for every event."""
+    for event in queue.events:
+        for target in targets:
+            if event.tag in get_event_listeners_copying(target).keys():
+                for func in get_event_listeners_copying(target)[event.tag]:
+                    func(event)
+    queue.clear()
+
+
+def make_targets(num_targets, num_tags):
+    def handler(event):
+        pass
+
+    targets = []
+    for index in range(num_targets):
+        if index % 2:
+            target = Service(name='service {}'.format(index))
+        else:
+            target = App(name='app {}'.format(index))
+            activity = Activity(name='main')
+            activity.event_listener('tag 0')(handler)
+            target.add(activity)
+            target.current_activity = activity
+        # every target listens to half of the tags
+        for tag in range(index % 2, num_tags, 2):
+            target.event_listener('tag {}'.format(tag))(handler)
+        targets.append(target)
+    return targets
+
+
+def events_per_second(broadcast, targets, num_tags, num_events=2000):
+    queue = Eventqueue('benchmark')
+    start = time.perf_counter()
+    for index in range(num_events):
+        queue.events.append(Event('tag {}'.format(index % num_tags)))
+        if len(queue.events) == 20:  # roughly one frame worth of events
+            broadcast(queue, *targets)
+    broadcast(queue, *targets)
+    return num_events / (time.perf_counter() - start)
+
+
+def main():
+    print('{:>8} {:>5} {:>16} {:>16}'.format('targets', 'tags', 'linear ev/s', 'table ev/s'))
+    for num_targets in (4, 10, 30):
+        for num_tags in (10, 50):
+            targets = make_targets(num_targets, num_tags)
+            linear = events_per_second(broadcast_linear, targets, num_tags)
+            table = events_per_second(lambda queue, *t: queue.broadcast(*t), targets, num_tags)
+            print('{:>8} {:>5} {:>16.0f} {:>16.0f}'.format(num_targets, num_tags, linear, table))
+
+
+if __name__ == '__main__':
+    main()
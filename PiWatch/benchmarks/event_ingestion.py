@@ -0,0 +1,57 @@
+"""Stress test for adding events from many threads while the main loop imports them.
+Checks that no event is lost or duplicated when the queue may not drop events,
+and reports the throughput per overflow policy.
+"""
+from benchmarks import headless  # must come before pygame and piwatch
+import threading
+import time
+
+from piwatch import Event, Eventqueue
+
+
+def stress(overflow, capacity, num_threads=16, events_per_thread=5000):
+    main_queue = Eventqueue('main')
+    queues = [Eventqueue('producer {}'.format(index), capacity=capacity, overflow=overflow)
+              for index in range(4)]
+
+    def produce(thread_index):
+        queue = queues[thread_index % len(queues)]
+        for number in range(events_per_thread):
+            queue.add(Event('stress', data=(thread_index, number)))
+
+    threads = [threading.Thread(target=produce, args=(index,)) for index in range(num_threads)]
+    received = []
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads) or any(queue.incoming for queue in queues):
+        main_queue.import_events(*queues)
+        received += main_queue.events
+        main_queue.clear()
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    sent = num_threads * events_per_thread
+    dropped = sum(queue.dropped for queue in queues)
+    unique = set(event.data for event in received)
+    # events of one thread must arrive in the order they were added
+    last = {}
+    for event in received:
+        thread_index, number = event.data
+        assert number > last.get(thread_index, -1), 'events of thread {} out of order'.format(thread_index)
+        last[thread_index] = number
+    assert len(unique) == len(received), 'duplicated events'
+    return sent, len(received), dropped, sent / elapsed
+
+
+def main():
+    print('{:>12} {:>9} {:>9} {:>9} {:>8} {:>12}'.format('policy', 'capacity', 'sent', 'received', 'dropped', 'events/s'))
+    for overflow, capacity in (('drop-oldest', None), ('block', 64), ('drop-oldest', 64), ('coalesce', 64)):
+        sent, received, dropped, rate = stress(overflow, capacity)
+        print('{:>12} {:>9} {:>9} {:>9} {:>8} {:>12.0f}'.format(overflow, str(capacity), sent, received, dropped, rate))
+        if overflow == 'block' or capacity is None:
+            assert received == sent, 'lost {} events'.format(sent - received)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""Time of a tick of the 110 pt stopwatch as a Text, rendered by freetype, and as a NumericText,
+composed from a GlyphStrip.
+"""
+from benchmarks import headless  # must come before pygame and piwatch
+import itertools
+import timeit
+
+import pygame
+
+from piwatch import NumericText, Text
+from piwatch.text import glyph_strips
+
+
+def ticks():
+    for seconds in itertools.count():
+        yield '{:02d}:{:02d}'.format(seconds // 60 % 100, seconds % 60)
+
+
+def main():
+    parent = pygame.display.set_mode((320, 240))
+    number = 300
+    print('{:>12} {:>10} {:>18}'.format('', 'us', 'freetype renders'))
+    for cls in (Text, NumericText):
+        stopwatch = cls(size=110, message='00:00', position=('center', 0, -25))
+        stopwatch.setup(parent)
+        values = ticks()
+
+        def tick():
+            # every value is new, like a running stopwatch, so the text cache never has it
+            stopwatch.update(message=next(values))
+            stopwatch.draw(parent)
+
+        seconds = min(timeit.repeat(tick, number=number, repeat=3)) / number
+        renders = sum(strip.renders for strip in glyph_strips.values()) if cls is NumericText else 3 * number
+        print('{:>12} {:>10.1f} {:>18}'.format(cls.__name__, seconds * 1e6, renders))
+
+
+if __name__ == '__main__':
+    main()
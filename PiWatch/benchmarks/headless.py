@@ -0,0 +1,51 @@
+"""Prepares the process to run PiWatch code without a display, GPIO pins or Bluetooth.
+Import this before importing piwatch or pygame.
+"""
+import os
+import sys
+import types
+
+os.environ['SDL_VIDEODRIVER'] = 'dummy'
+os.environ['SDL_AUDIODRIVER'] = 'dummy'
+
+
+def stub_gpio():
+    """Replace RPi.GPIO by a module whose pins never fire."""
+    gpio = types.ModuleType('RPi.GPIO')
+    gpio.BOARD, gpio.IN, gpio.PUD_UP, gpio.RISING = 10, 1, 22, 31
+
+    def ignore(*args, **kwargs):
+        pass
+
+    gpio.setmode = gpio.setup = gpio.add_event_detect = gpio.add_event_callback = gpio.cleanup = ignore
+    gpio.event_detected = lambda channel: False
+    rpi = types.ModuleType('RPi')
+    rpi.GPIO = gpio
+    sys.modules['RPi'] = rpi
+    sys.modules['RPi.GPIO'] = gpio
+
+
+def stub_bluetooth():
+    """Replace pybluez by a module that cannot connect to anything."""
+    bluetooth = types.ModuleType('bluetooth')
+    bluetooth.RFCOMM = 3
+    bluetooth.SERIAL_PORT_CLASS = bluetooth.SERIAL_PORT_PROFILE = None
+
+    def unavailable(*args, **kwargs):
+        raise OSError('bluetooth is stubbed in headless mode')
+
+    bluetooth.BluetoothSocket = bluetooth.advertise_service = unavailable
+    bluetooth.discover_devices = bluetooth.lookup_name = unavailable
+    sys.modules['bluetooth'] = bluetooth
+
+
+stub_gpio()
+stub_bluetooth()
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+import pygame.freetype
+
+pygame.display.init()
+pygame.freetype.init()
+screen = pygame.display.set_mode((320, 240))
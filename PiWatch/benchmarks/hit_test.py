@@ -0,0 +1,51 @@
+"""Hit tests per second with a linear check_collision() scan and with the HitIndex of an Activity."""
+from benchmarks import headless  # must come before pygame and piwatch
+import random
+import time
+
+import pygame
+
+from piwatch import Activity, Grid, Text
+
+
+def make_activity(columns, rows):
+    attrs = dict(Text.attributes, message='', size=1, fixed_size=(300 // columns - 1, 220 // rows - 1),
+                 bg_color=(0, 0, 0))
+    grid = Grid(children=[[Text(attrs) for _ in range(columns)] for _ in range(rows)], spacing=1)
+    activity = Activity('main')
+    activity.add(grid)
+    activity.setup(pygame.Surface((320, 240)))
+    return activity, grid
+
+
+def scan(grid, pos):
+    """What the apps did before: check every item, the last one that collides is on top."""
+    hit = None
+    for item in grid.flat_children:
+        if item.check_collision(pos):
+            hit = item
+    return hit
+
+
+def rate(func, points):
+    start = time.perf_counter()
+    for point in points:
+        func(point)
+    return len(points) / (time.perf_counter() - start)
+
+
+def main():
+    points = [(random.randrange(320), random.randrange(240)) for _ in range(5000)]
+    print('{:>10} {:>16} {:>16}'.format('drawables', 'scan tests/s', 'index tests/s'))
+    for columns, rows in ((5, 4), (10, 7), (20, 13), (40, 30)):
+        activity, grid = make_activity(columns, rows)
+        for point in points[:200]:
+            # between the cells, only the grid itself is hit
+            expected = scan(grid, point) or (grid if grid.check_collision(point) else None)
+            assert activity.hit_test(point) is expected, point
+        print('{:>10} {:>16.0f} {:>16.0f}'.format(
+            columns * rows, rate(lambda pos: scan(grid, pos), points), rate(activity.hit_test, points)))
+
+
+if __name__ == '__main__':
+    main()
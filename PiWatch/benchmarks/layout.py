@@ -0,0 +1,74 @@
+"""Time of a layout update when a cell changes colour or a nested text changes, compared to a full relayout."""
+from benchmarks import headless  # must come before pygame and piwatch
+import timeit
+
+import pygame
+
+from piwatch import Grid, List, Text
+
+
+def make_board(parent):
+    attrs = dict(Text.attributes, message='', size=1, fixed_size=15, bg_color=(0, 0, 0))
+    board = Grid(children=[[Text(attrs) for _ in range(20)] for _ in range(13)], spacing=1,
+                 position=('center', 0, 10), bg_color=(30, 30, 30))
+    board.setup(parent)
+    return board
+
+
+def make_nested(parent):
+    label = Text(message='00:00', size=20)
+    inner = List(children=[label, Text(message='inner', size=15)], direction='right', spacing=5)
+    middle = List(children=[inner, Text(message='middle', size=15)], spacing=5)
+    outer = List(children=[middle] + [Text(message='row {}'.format(i), size=15) for i in range(10)],
+                 position='center', spacing=5)
+    outer.setup(parent)
+    return outer, label
+
+
+def full_relayout(group):
+    group.child_resized()
+    group.arrange()
+
+
+def main():
+    parent = pygame.Surface((320, 240))
+    board = make_board(parent)
+    cells = list(board.flat_children)
+    colors = [(255, 255, 255), (0, 0, 0)]
+
+    def recolour():
+        colors.reverse()
+        cells[5].update(bg_color=colors[0])
+        cells[100].update(bg_color=colors[1])
+        board.update()
+        board.refresh()
+
+    def recolour_full():
+        recolour()
+        full_relayout(board)
+
+    outer, label = make_nested(parent)
+    messages = ['12:34', '12:35']
+
+    def retext(resize=False):
+        messages.reverse()
+        label.update(message=messages[0] + ('0' if resize and messages[0] == '12:34' else ''))
+        outer.refresh()
+
+    def retext_full():
+        retext()
+        full_relayout(outer)
+
+    print('{:>34} {:>12}'.format('scenario', 'us per op'))
+    for name, func in (('grid: 2 cells recoloured', recolour),
+                       ('grid: 2 cells + full relayout', recolour_full),
+                       ('nested list: same size text', retext),
+                       ('nested list: resized text', lambda: retext(resize=True)),
+                       ('nested list: text + full relayout', retext_full)):
+        number = 200
+        seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print('{:>34} {:>12.1f}'.format(name, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Time of storing and querying notifications in a full NotificationStore, and of reading its file at boot."""
+from benchmarks import headless  # must come before piwatch
+import os
+import tempfile
+import timeit
+
+from piwatch.notifications import NotificationStore
+
+APPS = ['whatsapp', 'mail', 'calendar', 'telegram', 'maps', 'phone']
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(prefix='piwatch-bench-'), 'notifications.jsonl')
+    store = NotificationStore().open(path)
+    counter = iter(range(10 ** 9))
+
+    def add():
+        index = next(counter)
+        store.add(APPS[index % len(APPS)], 'Title {}'.format(index), 'Text of notification {}'.format(index))
+
+    for _ in range(store.capacity):
+        add()
+    newest = store.query(limit=1)[0]
+    assert len(store) == store.capacity and sum(store.apps().values()) == store.capacity
+
+    number = 1000
+    print('{:>36} {:>10}'.format('', 'us'))
+    for name, func in (('add to a full store (and its file)', add),
+                       ('add a duplicate', lambda: store.add(newest.app, newest.title, newest.text)),
+                       ('newest 5', lambda: store.query(limit=5)),
+                       ('newest 5 of one app', lambda: store.query(app='mail', limit=5)),
+                       ('since the last sync, 10 new', lambda: store.query(since=store.ring[-11].time)),
+                       ('open the file', lambda: NotificationStore().open(path))):
+        repeat_number = 20 if name == 'open the file' else number
+        seconds = min(timeit.repeat(func, number=repeat_number, repeat=3)) / repeat_number
+        print('{:>36} {:>10.1f}'.format(name, seconds * 1e6))
+    with open(path) as file:
+        print('{} notifications stored, {} lines in the file'.format(len(store), sum(1 for line in file)))
+
+
+if __name__ == '__main__':
+    main()
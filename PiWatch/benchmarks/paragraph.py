@@ -0,0 +1,59 @@
+"""Time of breaking a notification into lines with glyph advances, compared to measuring every candidate line
+with freetype, and of rendering a Paragraph with and without the caches.
+"""
+from benchmarks import headless  # must come before pygame and piwatch
+import timeit
+
+import pygame
+
+from piwatch import Paragraph
+from piwatch.fonts import fonts
+from piwatch.text import LineBreaker, text_cache
+
+MESSAGE = ('Are we still meeting at eight tonight? I booked a table at the place near the station, '
+           'the one with the garden. Let me know if you are running late, I can move it to half past.')
+
+
+def measure_candidates(message, width, font):
+    """Break lines the way it is done without advances: measure the line with every next word."""
+    lines, line = [], ''
+    for word in message.split(' '):
+        candidate = line + ' ' + word if line else word
+        if line and font.get_rect(candidate).width > width:
+            lines.append(line)
+            candidate = word
+        line = candidate
+    return lines + [line]
+
+
+def main():
+    parent = pygame.display.set_mode((320, 240))
+    font = fonts.get('Roboto-Regular', 18)
+    paragraph = Paragraph(message=MESSAGE, size=18, width=230, max_lines=3)
+    paragraph.setup(parent)
+
+    def cold_break():
+        LineBreaker().lines(MESSAGE, 230, 'Roboto-Regular', 18)
+
+    warm = LineBreaker()
+    warm.lines(MESSAGE, 230, 'Roboto-Regular', 18)
+
+    def uncached_render():
+        text_cache.clear()
+        paragraph.render_image()
+
+    number = 200
+    print('{:>36} {:>10}'.format('', 'us'))
+    for name, func in (('measure every candidate line', lambda: measure_candidates(MESSAGE, 230, font)),
+                       ('break with advances, new fonts', cold_break),
+                       ('break with advances', lambda: warm.break_lines(MESSAGE, 230, 'Roboto-Regular', 18, None,
+                                                                        '…')),
+                       ('cached break', lambda: warm.lines(MESSAGE, 230, 'Roboto-Regular', 18)),
+                       ('render a paragraph', uncached_render),
+                       ('cached paragraph', paragraph.render_image)):
+        seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print('{:>36} {:>10.1f}'.format(name, seconds * 1e6))
+
+
+if __name__ == '__main__':
+    main()
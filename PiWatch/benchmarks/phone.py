@@ -0,0 +1,93 @@
+"""A scriptable stand-in for the PiWatch Android app, for watches that run with
+PIWATCH_BT_TRANSPORT=tcp or unix. Run the watch, touch 'start server' in the Bluetooth app, then e.g.:
+
+    PIWATCH_BT_TRANSPORT=tcp python3 -m benchmarks.phone --notifications 5 --interval 1
+"""
+from benchmarks import headless  # must come before piwatch
+import argparse
+import threading
+import time
+
+from piwatch.protocol import FrameDecoder, NotificationList, NotificationPosted, decode_message, encode_message
+from piwatch.transport import close_socket, transport_from_env
+
+
+class FakePhone:
+    """Connects to the watch and sends it messages. Messages from the watch are kept in received,
+    with the time they arrived, and the ones with a kind in replies are answered.
+    """
+    def __init__(self, transport=None):
+        self.transport = transport or transport_from_env()
+        self.sock = None
+        self.received = []  # (time.perf_counter(), Message)
+        self.replies = {
+            'list notifications': NotificationList([('whatsapp', 'Alice', 'See you at 8?'),
+                                                    ('mail', 'Bob', 'Minutes of the meeting')])
+        }
+        self.connected = threading.Event()
+        self.reading = threading.Event()  # clear it to stop reading, like a phone that is out of range
+        self.reading.set()
+
+    def connect(self, timeout=5):
+        """Connect to the watch, retrying until its server is listening."""
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                self.sock = self.transport.connect()
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise
+                time.sleep(0.01)
+        threading.Thread(target=self.read, daemon=True).start()
+        self.connected.wait(timeout)
+
+    def read(self):
+        decoder = FrameDecoder()
+        sock = self.sock
+        while True:
+            self.reading.wait()
+            try:
+                data = sock.recv(4096)
+            except OSError:
+                return
+            if not data:
+                return
+            for payload in decoder.feed(data):
+                message = decode_message(payload)
+                self.received.append((time.perf_counter(), message))
+                if message.kind == 'hello':
+                    self.connected.set()
+                if message.kind in self.replies:
+                    try:
+                        sock.sendall(encode_message(self.replies[message.kind]))
+                    except OSError:  # the watch closed the connection
+                        return
+
+    def send(self, *messages):
+        self.sock.sendall(b''.join(map(encode_message, messages)))
+
+    def post_notification(self, title, text='', package='com.whatsapp'):
+        self.send(NotificationPosted(package, title, text))
+
+    def close(self):
+        if self.sock:
+            close_socket(self.sock)
+            self.sock = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Post notifications to a watch like the Android app does.')
+    parser.add_argument('--notifications', type=int, default=1)
+    parser.add_argument('--interval', type=float, default=1)
+    args = parser.parse_args()
+    phone = FakePhone()
+    phone.connect()
+    for index in range(args.notifications):
+        phone.post_notification('Notification {}'.format(index + 1), 'sent by benchmarks.phone')
+        time.sleep(args.interval)
+    phone.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Feeds randomly chunked streams of random messages through the bluetooth frame decoder,
+checks that every message comes out unchanged and measures the throughput.
+
+    python3 -m benchmarks.protocol [--seed N] [--rounds N]
+"""
+from benchmarks import headless  # must come before piwatch
+import argparse
+import random
+import time
+
+from piwatch.protocol import FrameDecoder, Message, NotificationList, NotificationPosted, ProtocolError, \
+    decode_message, encode_message
+
+# includes the characters the old '|' separated format could not carry
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz ABC0123456789|:,.!?\néü中\U0001f600'
+
+
+def random_text(rng, longest=80):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randrange(longest)))
+
+
+def random_message(rng):
+    choice = rng.random()
+    if choice < 0.6:
+        return NotificationPosted('com.' + random_text(rng, 12), random_text(rng), random_text(rng, 300))
+    if choice < 0.9:
+        return NotificationList([(random_text(rng, 12), random_text(rng), random_text(rng))
+                                 for _ in range(rng.randrange(30))])
+    return Message(random_text(rng, 20), *(random_text(rng) for _ in range(rng.randrange(4))))
+
+
+def chunked(data, rng, largest=1024):
+    """Split data like recv() may: anywhere, including inside the length of a frame."""
+    start = 0
+    while start < len(data):
+        end = start + rng.randrange(1, largest + 1)
+        yield data[start:end]
+        start = end
+
+
+def decode_stream(decoder, chunks):
+    return [decode_message(payload) for chunk in chunks for payload in decoder.feed(chunk)]
+
+
+def check_round_trip(rng, rounds):
+    for _ in range(rounds):
+        messages = [random_message(rng) for _ in range(rng.randrange(1, 20))]
+        stream = b''.join(map(encode_message, messages))
+        decoder = FrameDecoder()
+        decoded = decode_stream(decoder, chunked(stream, rng, rng.choice((1, 7, 64, 1024))))
+        assert decoded == messages, (decoded, messages)
+        assert not decoder.buffer
+
+
+def check_garbage(rng, rounds):
+    """Corrupted streams must fail with ProtocolError and nothing else."""
+    failed = 0
+    for _ in range(rounds):
+        stream = bytearray(b''.join(encode_message(random_message(rng)) for _ in range(5)))
+        for _ in range(rng.randrange(1, 4)):
+            stream[rng.randrange(len(stream))] = rng.randrange(256)
+        try:
+            decode_stream(FrameDecoder(), chunked(bytes(stream), rng))
+        except ProtocolError:
+            failed += 1
+    return failed
+
+
+def throughput(rng):
+    messages = [random_message(rng) for _ in range(2000)]
+    stream = b''.join(map(encode_message, messages))
+    print('{:>24} {:>10} {:>10}'.format('chunk size', 'MB/s', 'msgs/s'))
+    for size in (64, 1024, 65536):
+        chunks = [stream[i:i + size] for i in range(0, len(stream), size)]
+        start = time.perf_counter()
+        count = len(decode_stream(FrameDecoder(), chunks))
+        seconds = time.perf_counter() - start
+        print('{:>24} {:>10.1f} {:>10.0f}'.format(size, len(stream) / seconds / 1e6, count / seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    check_round_trip(rng, args.rounds)
+    print('{} random streams decoded unchanged'.format(args.rounds))
+    failed = check_garbage(rng, args.rounds)
+    print('{} corrupted streams, {} rejected with ProtocolError, no other errors'.format(args.rounds, failed))
+    throughput(rng)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Compares a List with a row for every notification to a RecyclerList, for feeds of growing length."""
+from benchmarks import headless  # must come before pygame and piwatch
+import timeit
+
+import pygame
+
+from piwatch import List, RecyclerList, Text
+
+ROW = dict(List.attributes, alignment='topleft', position=('topleft', 0, 0), bg_color=(200, 200, 200),
+           fixed_size=(280, 37))
+
+
+def make_row(title='', text=''):
+    return List(ROW, children=[Text(color=(0, 0, 0), size=16, padding=(6, 5), message=title),
+                               Text(color=(0, 0, 0), size=14, padding=(6, 3), message=text)])
+
+
+def make_list(parent, count):
+    feed = List(position=('topleft', 20, 25), alignment='topleft', spacing=5,
+                children=[make_row('Title {}'.format(index), 'Text {}'.format(index)) for index in range(count)])
+    feed.setup(parent)
+    return feed
+
+
+def make_recycler(parent, count):
+    def bind_row(row, index):
+        row.children[0].update(message='Title {}'.format(index))
+        row.children[1].update(message='Text {}'.format(index))
+
+    feed = RecyclerList(position=('topleft', 20, 25), size=(280, 215), row_height=37, spacing=5, count=count,
+                        make_row=make_row, bind_row=bind_row)
+    feed.setup(parent)
+    return feed
+
+
+def main():
+    parent = pygame.Surface((320, 240))
+    print('{:>6} {:>16} {:>16} {:>16} {:>16} {:>16}'.format(
+        'rows', 'List setup us', 'List draw us', 'Recycler setup', 'Recycler draw', 'Recycler scroll'))
+    for count in (5, 50, 500):
+        feed = make_list(parent, count)
+        recycler = make_recycler(parent, count)
+        step = [1]
+
+        def scroll():
+            if not 0 < recycler.scroll + step[0] * 20 < recycler.max_scroll:
+                step[0] = -step[0]
+            recycler.scroll_to(recycler.scroll + step[0] * 20)
+
+        times = []
+        for func, number in ((lambda: make_list(parent, count), 3), (lambda: feed.draw(parent), 20),
+                             (lambda: make_recycler(parent, count), 3), (lambda: recycler.draw(parent), 20),
+                             (scroll, 200)):
+            times.append(min(timeit.repeat(func, number=number, repeat=3)) / number * 1e6)
+        print('{:>6} {:>16.0f} {:>16.0f} {:>16.0f} {:>16.0f} {:>16.0f}'.format(count, *times))
+
+
+if __name__ == '__main__':
+    main()
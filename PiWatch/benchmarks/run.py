@@ -0,0 +1,224 @@
+"""Runs every bundled app through scripted input on a headless PiWatch and reports the frame times.
+
+    python3 -m benchmarks.run                          print a table
+    python3 -m benchmarks.run --json results.json      also write the results as JSON
+    python3 -m benchmarks.run --save-baseline base.json
+    python3 -m benchmarks.run --baseline base.json     exit with status 1 if a scenario got slower
+
+Other options: --frames N (frames per scenario), --threshold PERCENT (allowed slowdown, default 20),
+--min-delta MS (smaller slowdowns are noise, default 0.5), --dirty (dirty-rectangle rendering)
+and --only NAME (run a single scenario).
+Frames are not limited to 15 fps and main.wait_for_frame() is skipped, so every frame is measured.
+"""
+from benchmarks import headless  # must come before pygame and piwatch
+import argparse
+import itertools
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pygame
+
+from piwatch import NotificationList, NotificationPosted, notifications
+
+NOTIFICATION_LIST = NotificationList([('whatsapp', 'Alice', 'See you at 8?'), ('mail', 'Bob', 'Minutes of the meeting'),
+                                      ('calendar', 'Meeting', 'in 15 minutes')])
+
+
+def click(pos):
+    return 'click', pos
+
+
+def repeat(every, action, start=0):
+    """An action for every 'every' frames, starting at frame 'start'."""
+    return 'repeat', (every, start, action)
+
+
+# scenario name -> (app to start, list of (frame, action))
+SCENARIOS = {
+    'Home': ('Home', [(5, click((160, 120)))]),
+    # frames are not paced, so the steps of the snake are sent directly instead of by its timer
+    'Snake': ('Snake', [repeat(2, ('snake step', None)), (20, click((160, 40))), (40, click((60, 120))),
+                        (60, click((160, 200))), (80, click((260, 120)))]),
+    'Minesweeper': ('Minesweeper', [repeat(10, 'click random tile')]),
+    'Calculator': ('Calculator', [repeat(4, 'click random button')]),
+    'Stopwatch': ('Stopwatch', [(5, click((160, 200))), (100, click((160, 200)))]),
+    'appdrawer': ('appdrawer', [repeat(30, 'back to appdrawer', start=29), repeat(30, click((160, 120)))]),
+    'Notifications': ('Notifications', [repeat(20, 'post notification'),
+                                        repeat(20, ('bt message notification list', NOTIFICATION_LIST),
+                                               start=10)]),
+}
+
+PHASES = ('events', 'layout', 'render')
+minutes = itertools.count()
+
+
+def load_main(dirty):
+    """Import main.py without running it. It reads its flags from sys.argv, like on the watch.
+    Notifications are stored in a temporary file, so the runs don't depend on each other.
+    """
+    notifications.open(os.path.join(tempfile.mkdtemp(prefix='piwatch-bench-'), 'notifications.jsonl'))
+    sys.argv = ['main.py', '-d'] + (['--dirty'] if dirty else [])
+    import main
+    main.boot()
+    return main
+
+
+def perform(main, action):
+    if action == 'click random tile':
+        action = click((random.randrange(10, 310), random.randrange(20, 235)))
+    elif action == 'click random button':
+        action = click((random.randrange(20, 300), random.randrange(100, 230)))
+    elif action == 'post notification':
+        # every notification is new, the notification store ignores duplicates
+        action = ('bt message notification posted',
+                  NotificationPosted('com.whatsapp', 'Alice', 'See you at {}:{:02}?'.format(*divmod(next(minutes), 60))))
+    elif action == 'back to appdrawer':
+        main.main_eventqueue.add('main start app', data='appdrawer')
+        return
+    if action[0] == 'click':
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=action[1], button=1))
+        pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONUP, pos=action[1], button=1))
+    else:
+        main.main_eventqueue.add(main.Event(action[0], data=action[1]))
+
+
+def actions_for(script, index):
+    for frame, action in script:
+        if frame == 'repeat':
+            every, start, action = action
+            if index >= start and (index - start) % every == 0:
+                yield action
+        elif frame == index:
+            yield action
+
+
+def run_frames(main, script, frames, trace_memory=False):
+    """Run frames and return the time of every phase of every frame, in milliseconds."""
+    samples = []
+    for index in range(frames):
+        for action in actions_for(script, index):
+            perform(main, action)
+        if trace_memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        main.dispatch_events()
+        events = time.perf_counter()
+        main.refresh()
+        layout = time.perf_counter()
+        main.draw()
+        render = time.perf_counter()
+        sample = dict(events=(events - start) * 1000, layout=(layout - events) * 1000,
+                      render=(render - layout) * 1000, total=(render - start) * 1000)
+        if trace_memory:
+            sample['allocated_bytes'] = tracemalloc.get_traced_memory()[1] - before
+            sample['new_blocks'] = sys.getallocatedblocks() - blocks
+        samples.append(sample)
+    return samples
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def summarize(samples, memory_samples):
+    totals = [sample['total'] for sample in samples]
+    return dict(
+        frames=len(samples),
+        p50_ms=percentile(totals, 50),
+        p90_ms=percentile(totals, 90),
+        p99_ms=percentile(totals, 99),
+        max_ms=max(totals),
+        breakdown_ms={phase: statistics.mean(sample[phase] for sample in samples) for phase in PHASES},
+        allocated_bytes_per_frame=statistics.mean(sample['allocated_bytes'] for sample in memory_samples),
+        new_blocks_per_frame=statistics.mean(sample['new_blocks'] for sample in memory_samples),
+        peak_rss_kib=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    )
+
+
+def run_scenario(main, name, frames):
+    app_name, script = SCENARIOS[name]
+    main.main_eventqueue.add('main start app', data=app_name)
+    run_frames(main, [], 5)  # let the app start and settle
+    samples = run_frames(main, script, frames)
+    tracemalloc.start()
+    try:
+        memory_samples = run_frames(main, script, max(frames // 4, 1), trace_memory=True)
+    finally:
+        tracemalloc.stop()
+    return summarize(samples, memory_samples)
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Return a description of every scenario whose p50 or p99 frame time got more than threshold percent
+    and more than min_delta milliseconds slower."""
+    if results['render_mode'] != baseline['render_mode']:
+        return ['the baseline was measured with render mode {}'.format(baseline['render_mode'])]
+    regressions = []
+    for name, result in results['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if not old:
+            continue
+        for metric in ('p50_ms', 'p99_ms'):
+            if result[metric] > old[metric] * (1 + threshold / 100) and result[metric] - old[metric] > min_delta:
+                regressions.append('{} {}: {:.2f} ms, baseline {:.2f} ms'.format(name, metric, result[metric], old[metric]))
+    return regressions
+
+
+def print_table(results):
+    print()
+    print('{:>14} {:>7} {:>7} {:>7} {:>7} {:>8} {:>8} {:>8} {:>10} {:>8}'.format(
+        'scenario', 'p50', 'p90', 'p99', 'max', 'events', 'layout', 'render', 'alloc KiB', 'blocks'))
+    for name, result in results['scenarios'].items():
+        print('{:>14} {p50_ms:>7.2f} {p90_ms:>7.2f} {p99_ms:>7.2f} {max_ms:>7.2f} '
+              '{b[events]:>8.2f} {b[layout]:>8.2f} {b[render]:>8.2f} {alloc:>10.1f} {new_blocks_per_frame:>8.1f}'.format(
+                  name, b=result['breakdown_ms'], alloc=result['allocated_bytes_per_frame'] / 1024, **result))
+    print('times in ms per frame, peak RSS: {} KiB'.format(results['peak_rss_kib']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless PiWatch frame benchmarks.')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--dirty', action='store_true')
+    parser.add_argument('--only')
+    parser.add_argument('--json')
+    parser.add_argument('--save-baseline')
+    parser.add_argument('--baseline')
+    parser.add_argument('--threshold', type=float, default=20)
+    parser.add_argument('--min-delta', type=float, default=0.5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    piwatch_main = load_main(args.dirty)
+    names = [args.only] if args.only else list(SCENARIOS)
+    results = dict(render_mode=piwatch_main.render_mode, frames=args.frames, scenarios={})
+    for name in names:
+        results['scenarios'][name] = run_scenario(piwatch_main, name, args.frames)
+    results['peak_rss_kib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print_table(results)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w') as file:
+                json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold, args.min_delta)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            sys.exit(1)
+        print('no regressions against', args.baseline)
+
+
+if __name__ == '__main__':
+    main()
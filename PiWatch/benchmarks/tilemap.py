@@ -0,0 +1,56 @@
+"""Compares the snake board as a Grid of Text cells with the same board as a TileMap."""
+from benchmarks import headless  # must come before pygame and piwatch
+import timeit
+
+import pygame
+
+from piwatch import Grid, Text, TileMap
+
+COLUMNS, ROWS = 20, 13
+COLORS = [(0, 0, 0), (255, 255, 255)]
+
+
+def make_grid(parent):
+    attrs = dict(Text.attributes, message='', size=1, fixed_size=15, bg_color=COLORS[0])
+    grid = Grid(children=[[Text(attrs) for _ in range(COLUMNS)] for _ in range(ROWS)], spacing=1,
+                position=('center', 0, 10), bg_color=(30, 30, 30))
+    grid.setup(parent)
+    return grid
+
+
+def make_tilemap(parent):
+    tilemap = TileMap(columns=COLUMNS, rows=ROWS, tile_size=15, spacing=1, palette={0: COLORS[0], 1: COLORS[1]},
+                      position=('center', 0, 10), bg_color=(30, 30, 30))
+    tilemap.setup(parent)
+    return tilemap
+
+
+def main():
+    parent = pygame.Surface((320, 240))
+    grid = make_grid(parent)
+    tilemap = make_tilemap(parent)
+    step = [0]
+
+    def step_grid():
+        step[0] ^= 1
+        grid.children[3][4].update(bg_color=COLORS[step[0]])
+        grid.children[7][9].update(bg_color=COLORS[1 - step[0]])
+        grid.update()
+
+    def step_tilemap():
+        step[0] ^= 1
+        tilemap.set_tile(4, 3, step[0])
+        tilemap.set_tile(9, 7, 1 - step[0])
+
+    print('{:>24} {:>12} {:>12}'.format('', 'Grid us', 'TileMap us'))
+    for name, grid_func, tilemap_func in (
+            ('setup', lambda: make_grid(parent), lambda: make_tilemap(parent)),
+            ('change 2 cells', step_grid, step_tilemap),
+            ('draw whole board', lambda: grid.draw(parent), lambda: tilemap.draw(parent))):
+        number = 20 if name == 'setup' else 200
+        times = [min(timeit.repeat(func, number=number, repeat=3)) / number for func in (grid_func, tilemap_func)]
+        print('{:>24} {:>12.1f} {:>12.1f}'.format(name, times[0] * 1e6, times[1] * 1e6))
+
+
+if __name__ == '__main__':
+    main()
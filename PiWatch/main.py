@@ -10,6 +10,9 @@ import time
 assert sys.version_info >= (3, 0)
 
 debug_mode = "-d" in sys.argv
+render_mode = 'dirty' if "--dirty" in sys.argv else 'full'  # 'dirty' only pushes changed regions to the display
+idle_mode = "--idle" in sys.argv  # only run a frame when something changed, instead of a fixed 15 fps
+profile_mode = "--profile" in sys.argv  # time every phase of the frames and show them in a graph
 appsfolder = 'apps'
 sys.path.append(os.path.dirname(os.path.abspath(__file__)) + os.sep + appsfolder)
 current_app = None
@@ -18,9 +21,12 @@ current_services = None
 screen = None
 main_variables = None
 main_eventqueue = None
+fps = None
 apps = {}
 overlays = {}
 services = {}
+modules = {}
+manifest = None
 sleep = False
 
 # Settings
@@ -48,7 +54,11 @@ def start_app(app_name, screen):
     global apps, current_app, main_eventqueue
     if current_app:
         main_eventqueue.add(Event('closed app {}'.format(current_app.name)))
-    current_app = apps[app_name]
+        if current_app.name != app_name:
+            # the closed app is not broadcast to anymore, so it gets its own copy
+            main_eventqueue.add(Event('closed app {}'.format(current_app.name), target=current_app))
+    current_app = define('apps', app_name)
+    damage.invalidate()
     if not current_app.started:
         current_app.start(screen)
         main_eventqueue.add(Event('started app {}'.format(current_app.name)))
@@ -59,57 +69,42 @@ def start_app(app_name, screen):
 
 def start_service(service_name):
     global services, current_services, main_eventqueue
-    current_services.append(services[service_name])
+    current_services.append(define('services', service_name))
     main_eventqueue.add(Event('started service {}'.format(service_name)))
 
 
 def start_overlay(overlay_name, screen):
     global overlays, current_overlays, main_eventqueue
-    overlay = overlays[overlay_name]
+    overlay = define('overlays', overlay_name)
     current_overlays.append(overlay)
     overlay.start(screen)
     main_eventqueue.add(Event('started overlay {}'.format(overlay_name)))
 
 
-def load_apps_and_services():
-    """Read .py files from the apps folder"""
+def load_manifest():
+    """Find the apps, overlays and services in the apps folder. They are only defined when they are started."""
+    global manifest
     print('Loading apps...')
-    _apps = {}
-    _services = {}
-    _overlays = {}
-    for file in list(os.listdir(appsfolder)):
-        if file.split('.')[-1] == 'py':
-            appname = '.'.join(file.split('.')[:-1])
-            print('  - ' + appname)
-            app_module = load_module(appname)
-            if hasattr(app_module, 'define_app'):
-                app = app_module.define_app()
-                _apps[app.name] = app
-            if hasattr(app_module, 'define_overlay'):
-                overlay = app_module.define_overlay()
-                _overlays[overlay.name] = overlay
-            if hasattr(app_module, 'define_services'):
-                returned_service = app_module.define_services()
-                if type(returned_service) is list or type(returned_service) is tuple:
-                    for service in returned_service:
-                        _services[service.name] = service
-                else:
-                    _services[returned_service.name] = returned_service
-
-    if len(_apps) == 1:
-        print(len(_apps), 'app loaded.')
-    else:
-        print(len(_apps), 'apps loaded.')
-    if len(_overlays) == 1:
-        print(len(_overlays), 'overlay loaded.')
-    else:
-        print(len(_overlays), 'overlays loaded.')
-    if len(_services) == 1:
-        print(len(_services), 'service loaded.')
-    else:
-        print(len(_services), 'services loaded.')
+    manifest = AppManifest(appsfolder).load()
+    for module in manifest.rebuilt:
+        print('  - ' + module)
+    for kind in ('apps', 'overlays', 'services'):
+        amount = len(manifest.names(kind))
+        print(amount, kind[:-1] if amount == 1 else kind, 'found.')
     print()
-    return _apps, _services, _overlays
+
+
+def define(kind, name):
+    """Return the app, overlay or service (kind) called name. Its module is imported and defined the first time."""
+    defined = {'apps': apps, 'overlays': overlays, 'services': services}[kind]
+    if name not in defined:
+        module_name = manifest.module_of(kind, name)
+        if module_name not in modules:
+            modules[module_name] = load_module(module_name)
+        returned = getattr(modules[module_name], DEFINE_FUNCTIONS[kind])()
+        for item in returned if type(returned) in (list, tuple) else [returned]:
+            defined[item.name] = item
+    return defined[name]
 
 
 def handle_main_events(main_events):
@@ -127,6 +122,7 @@ def handle_main_events(main_events):
         elif event.tag == 'main close overlay':
             print("Closing:", event.data)
             for overlay in filter(lambda o: o.name == event.data, current_overlays):
+                overlay.current_activity.mark_dirty()
                 current_overlays.remove(overlay)
         elif event.tag == 'main notification':
             if 'notification' not in (overlay.name for overlay in current_overlays):
@@ -136,6 +132,11 @@ def handle_main_events(main_events):
             main_eventqueue.add(Event('variable return', target=event.source, data=(event.data, main_variables[event.data])))
         elif event.tag == 'main set variable':
             main_variables[event.data[0]] = event.data[1]
+        elif event.tag == 'main dump trace':
+            if profiler.enabled:
+                print('Wrote trace of the last frames to', profiler.dump(event.data))
+            else:
+                print('The profiler is off, start the profiler overlay or use --profile')
         elif event.tag == 'main sleep':
             pass
         elif event.tag == 'main exit':
@@ -144,13 +145,67 @@ def handle_main_events(main_events):
             print("Main event not recognised: ", event)
 
 
-def run():
+def has_pending_work():
+    """Whether the next frame has events to handle, timers that are due or damage to draw.
+    While the watch is asleep nothing is drawn and timers wait, so only events count.
     """
-    Main function of the PiWatch
-    """
-    # PiWatch boot procedure
-    global apps, services, overlays, current_app, current_services, current_overlays, screen, main_variables, main_eventqueue, sleep
-    apps, services, overlays = load_apps_and_services()
+    queues = [main_eventqueue, current_app.eventqueue] + [service.eventqueue for service in current_services]
+    if sleep:
+        return any(queue.events for queue in queues)
+    return (bool(damage) or animator.active or timers.seconds_until_next() == 0
+            or any(queue.events for queue in queues))
+
+
+def report_scheduler_stats():
+    main_variables['scheduler'] = scheduler.stats()
+    if debug_mode:
+        print('idle: {idle_percentage:.1f}%, wake-ups per second: {wakeups_per_second:.2f}'.format(
+            **main_variables['scheduler']))
+    scheduler.reset_stats()
+
+
+def draw_full(screen):
+    """Redraw everything and flip the whole display."""
+    damage.pop()
+    start = profiler.start()
+    screen.fill(current_app.bg_color)
+    current_app.draw(screen)
+    profiler.stop('draw ' + current_app.name, start, 'draw app')
+    for overlay in current_overlays:
+        start = profiler.start()
+        overlay.draw(screen)
+        profiler.stop('draw ' + overlay.name, start, 'draw overlay')
+    start = profiler.start()
+    pygame.display.flip()
+    profiler.stop('flip', start)
+
+
+def draw_dirty(screen):
+    """Repaint only the regions that changed and push just those to the display."""
+    rects = damage.pop()
+    if not rects:
+        return
+    for rect in rects:
+        screen.set_clip(rect)
+        start = profiler.start()
+        screen.fill(current_app.bg_color)
+        current_app.draw(screen)
+        profiler.stop('draw ' + current_app.name, start, 'draw app', {'rect': list(rect)})
+        for overlay in current_overlays:
+            start = profiler.start()
+            overlay.draw(screen)
+            profiler.stop('draw ' + overlay.name, start, 'draw overlay', {'rect': list(rect)})
+    screen.set_clip(None)
+    start = profiler.start()
+    pygame.display.update(rects)
+    profiler.stop('flip', start)
+
+
+def boot():
+    """PiWatch boot procedure: load the apps, open the display and start the default apps."""
+    global current_services, current_overlays, screen, main_variables, main_eventqueue, fps
+    boot_start = time.perf_counter()
+    load_manifest()
     pygame.init()
     if sys.platform == 'linux' and not debug_mode:
         screen = pygame.display.set_mode(screenres, pygame.FULLSCREEN)
@@ -158,10 +213,12 @@ def run():
     else:
         screen = pygame.display.set_mode(screenres)
     pygame.display.set_caption("PiWatch")
+    fonts.preload()
+    damage.screen_rect = screen.get_rect()
     main_variables = {
-        'apps': apps,
-        'overlays': overlays,
-        'services': services,
+        'apps': manifest.names('apps'),
+        'overlays': manifest.names('overlays'),
+        'services': manifest.names('services'),
         'bt_connected': False
     }
     main_eventqueue = Eventqueue('main')
@@ -179,44 +236,112 @@ def run():
     start_overlay('bluetooth_overlay', screen)
     start_overlay('clock', screen)
     start_service('bluetooth service')
+    start_service('notification store')
+    if profile_mode:
+        profiler.enabled = True
+        start_overlay('profiler', screen)
+    main_variables['boot_time'] = time.perf_counter() - boot_start
+    print('Booted in {:.2f} s'.format(main_variables['boot_time']))
 
-    # mainloop
-    while True:
-        # events
-        main_eventqueue.import_events(current_app, *current_services)
-        main_eventqueue.add('new frame', data=main_variables['fps'])
-        events_for_main = filter(lambda e: e.tag[:4] == 'main', main_eventqueue.events)
-        main_eventqueue.handle_events()
-        if sleep:
-            if 'main sleep' in (event.tag for event in main_eventqueue.events):
-                sleep = False
-            else:
-                main_eventqueue.clear()
-                pygame.time.wait(300)
-                screen.fill((0, 0, 0))
-                pygame.display.flip()
-                continue
+
+def wait_for_frame():
+    """In idle mode, block until the next frame has something to do."""
+    if idle_mode:
+        scheduler.wait(busy=has_pending_work(), deadlines=not sleep)
+        if time.time() - scheduler.stats_start >= 10:
+            report_scheduler_stats()
+    else:
+        scheduler.pop_due(time.time())  # nothing waits for the deadlines, don't let them pile up
+
+
+def dispatch_events():
+    """Collect the events of this frame and send them to their listeners.
+    Returns False if the watch is asleep, then nothing else has to be done this frame.
+    """
+    global sleep
+    start = profiler.start()
+    # the events of a frame while asleep are cleared, so timers that are due fire when the watch wakes up
+    if not sleep:
+        main_eventqueue.add(*timers.pop_due())
+    main_eventqueue.import_events(current_app, *current_services)
+    main_eventqueue.add('new frame', data=main_variables['fps'])
+    events_for_main = filter(lambda e: e.tag[:4] == 'main', main_eventqueue.events)
+    profiler.stop('import events', start, 'import')
+    start = profiler.start()
+    main_eventqueue.handle_events()
+    profiler.stop('handle_events', start, 'input')
+    if sleep:
+        if 'main sleep' in (event.tag for event in main_eventqueue.events):
+            sleep = False
+            damage.invalidate()
         else:
-            if 'main sleep' in (event.tag for event in main_eventqueue.events):
-                sleep = True
-        main_eventqueue.broadcast(current_app, *(current_services + current_overlays))
-        handle_main_events(events_for_main)
-
-        # fps counter
-        fps.tick(15)
-        try:
-            main_variables['fps'] = int(fps.get_fps())
-        except OverflowError:
-            main_variables['fps'] = 'Infinity'
-
-        # Draw
-        screen.fill(current_app.bg_color)
-        current_app.draw(screen)
-        for overlay in current_overlays:
-            overlay.draw(screen)
+            main_eventqueue.clear()
+            animator.finish()  # refresh() doesn't run while asleep, so they would never end
+            damage.pop()  # the screen is black, everything is redrawn when the watch wakes up
+            if not idle_mode:
+                pygame.time.wait(300)
+            screen.fill((0, 0, 0))
+            pygame.display.flip()
+            return False
+    else:
+        if 'main sleep' in (event.tag for event in main_eventqueue.events):
+            sleep = True
+            animator.finish()
+    start = profiler.start()
+    main_eventqueue.broadcast(current_app, *(current_services + current_overlays))
+    profiler.stop('broadcast', start)
+    start = profiler.start()
+    handle_main_events(events_for_main)
+    profiler.stop('main events', start, 'main')
+    return True
+
+
+def tick():
+    """Limit the frame rate to 15 fps and update the fps counter."""
+    start = profiler.start()
+    fps.tick(15)
+    profiler.stop('tick', start, 'wait')
+    try:
+        main_variables['fps'] = int(fps.get_fps())
+    except OverflowError:
+        main_variables['fps'] = 'Infinity'
 
-        pygame.display.flip()
+
+def refresh():
+    """Step the animations, let time dependent drawables update themselves and redo layouts that changed."""
+    start = profiler.start()
+    animator.step()
+    current_app.refresh()
+    for overlay in current_overlays:
+        overlay.refresh()
+    profiler.stop('refresh', start)
+
+
+def draw():
+    if render_mode == 'dirty':
+        draw_dirty(screen)
+    elif damage or not idle_mode:
+        draw_full(screen)
+
+
+def frame():
+    wait_for_frame()
+    profiler.begin_frame()
+    if dispatch_events():
+        tick()
+        refresh()
+        draw()
+    profiler.end_frame()
+
+
+def run():
+    """
+    Main function of the PiWatch
+    """
+    boot()
+    while True:
+        frame()
 
 
-# Call the main function
-run()
+if __name__ == '__main__':
+    run()
@@ -7,5 +7,16 @@ from .layout import *
 from .text import *
 from .thread import *
 from .constants import *
-
-
+from .render import *
+from .fonts import *
+from .cache import *
+from .scheduler import *
+from .tilemap import *
+from .hittest import *
+from .profiler import *
+from .manifest import *
+from .assets import *
+from .protocol import *
+from .transport import *
+from .notifications import *
+from .animation import *
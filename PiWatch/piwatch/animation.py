@@ -0,0 +1,103 @@
+"""Tweens of the offset and alpha of drawables, driven by the clock of the main loop.
+
+    animate(notification, offset=(0, -80), alpha=0, duration=0.25, easing='ease-in', then=hide)
+
+Only Drawable.transform() is animated, so an animation blits a snapshot of the drawable
+every frame and never renders it or redoes a layout.
+"""
+import time
+
+
+def linear(t):
+    return t
+
+
+def ease_in(t):
+    return t * t
+
+
+def ease_out(t):
+    return 1 - (1 - t) * (1 - t)
+
+
+def ease_in_out(t):
+    return t * t * (3 - 2 * t)
+
+
+EASINGS = {'linear': linear, 'ease-in': ease_in, 'ease-out': ease_out, 'ease-in-out': ease_in_out}
+
+
+class Animation:
+    """Moves the offset and alpha of a drawable from their current values to offset and alpha.
+    The values are computed from the time, so when frames run late the steps in between are skipped
+    and the animation still ends on time. then() is called when it ended.
+    """
+    def __init__(self, drawable, offset=None, alpha=None, duration=0.3, easing='ease-out', then=None):
+        self.drawable = drawable
+        self.start_offset = drawable.offset
+        self.end_offset = tuple(offset) if offset is not None else drawable.offset
+        self.start_alpha = drawable.alpha
+        self.end_alpha = alpha if alpha is not None else drawable.alpha
+        self.duration = duration
+        self.easing = EASINGS[easing] if isinstance(easing, str) else easing
+        self.then = then
+        self.start = None  # the first frame after animate() shows the start values
+
+    def step(self, now):
+        """Apply the values for time now, return whether the animation ended."""
+        if self.start is None:
+            self.start = now
+        progress = min(1, (now - self.start) / self.duration) if self.duration > 0 else 1
+        self.apply(self.easing(progress))
+        return progress >= 1
+
+    def apply(self, eased):
+        self.drawable.transform(
+            tuple(round(start + (end - start) * eased) for start, end in zip(self.start_offset, self.end_offset)),
+            round(self.start_alpha + (self.end_alpha - self.start_alpha) * eased))
+
+
+class Animator:
+    """Runs the animations of all drawables, one per drawable: a new animation replaces the running one.
+    The main loop calls step() every frame before drawing and doesn't sleep while active is True.
+    """
+    def __init__(self):
+        self.animations = {}  # drawable -> Animation
+
+    @property
+    def active(self):
+        return bool(self.animations)
+
+    def animate(self, drawable, **kwargs):
+        animation = Animation(drawable, **kwargs)
+        self.animations[drawable] = animation
+        return animation
+
+    def step(self, now=None):
+        now = time.perf_counter() if now is None else now
+        for drawable, animation in list(self.animations.items()):
+            if animation.step(now):
+                if self.animations.get(drawable) is animation:
+                    del self.animations[drawable]
+                if animation.then:
+                    animation.then()
+
+    def finish(self):
+        """End every animation at its end values right away, e.g. when the watch goes to sleep."""
+        while self.animations:
+            drawable, animation = self.animations.popitem()
+            animation.apply(1)
+            if animation.then:
+                animation.then()
+
+    def cancel(self, drawable):
+        """Stop the animation of drawable where it is."""
+        self.animations.pop(drawable, None)
+
+
+animator = Animator()
+
+
+def animate(drawable, **kwargs):
+    """Start an Animation of drawable, see Animation for the arguments."""
+    return animator.animate(drawable, **kwargs)
@@ -1,33 +1,117 @@
 """Defines the classes for the construction of PiWatch-apps."""
 import os
 
+from .event import Event
 from .event import EventHandler
 from .event import EventListener
+from .hittest import HitIndex
+
+
+def app_folder(name):
+    """The folder with the resources of the app called name."""
+    return ('apps' + os.sep + name.lower() + os.sep).replace(' ', '_')
 
 
 class Activity(EventListener):
     """Represents one "page" of an application. This contains Drawables.
+    Clicks are sent as a 'tap' event to the drawable under the mouse, see dispatch_tap.
+    Moving the mouse while pressing it sends 'drag' events to the drawable it was pressed on, see dispatch_drag.
     """
+    DRAG_THRESHOLD = 8  # pixels the mouse may move between down and up for a tap
+
     def __init__(self, name):
         self.name = name
         self.objects = []  # later objects are drawn OVER earlier objects
+        self.hit_index = HitIndex()
+        self.drag_target = None
+        self.drag_start = None
+        self.dragged = False
         EventListener.__init__(self)
+        self.event_listener('mouse down')(self.dispatch_press)
+        self.event_listener('mouse motion')(self.dispatch_drag)
+        self.event_listener('mouse up')(self.dispatch_tap)
 
     def add(self, *args):
         for object in args:
             self.objects.append(object)
+            object.index_into(self.hit_index, (len(self.objects) - 1,))
+            object.mark_dirty()
 
     def clear(self):
+        self.mark_dirty()
+        for object in self.objects:
+            object.unindex()
         self.objects = []
 
+    def hit_test(self, pos):
+        """The visible drawable at pos that is drawn on top, None if there is none."""
+        return self.hit_index.hit_test(pos)
+
+    def hit_test_all(self, pos):
+        return self.hit_index.hit_test_all(pos)
+
+    def top_listener(self, pos, tag):
+        """The top drawable at pos that listens for tag, None if there is none."""
+        for drawable in self.hit_test_all(pos):
+            if tag in drawable.get_event_listeners():
+                return drawable
+        return None
+
+    def dispatch_press(self, event):
+        self.drag_target = self.top_listener(event.pos, 'drag')
+        self.drag_start = event.pos
+        self.dragged = False
+
+    def dispatch_drag(self, event):
+        """Send Event('drag') with the movement (dx, dy) as data to the drawable the mouse was pressed on."""
+        if self.drag_start is None:
+            return
+        movement = event.data
+        if not self.dragged:
+            movement = (event.pos[0] - self.drag_start[0], event.pos[1] - self.drag_start[1])
+            if abs(movement[0]) + abs(movement[1]) <= self.DRAG_THRESHOLD:
+                return
+            self.dragged = True  # the movement so far is sent at once
+        if self.drag_target:
+            drag = Event('drag', source=self.drag_target, target=self.drag_target, pos=event.pos, data=movement)
+            for func in self.drag_target.get_event_listeners()['drag']:
+                func(drag)
+
+    def dispatch_tap(self, event):
+        """Send Event('tap') to the top drawable at the mouse position that listens for it.
+        So a tap on the icon of a List goes to the List if the icon has no 'tap' listener.
+        The tap event has the listening drawable as target and the top drawable as source.
+        A press that turned into a drag is not a tap.
+        """
+        dragged, self.drag_start, self.drag_target, self.dragged = self.dragged, None, None, False
+        if dragged:
+            return
+        hits = self.hit_test_all(event.pos)
+        for drawable in hits:
+            funcs = drawable.get_event_listeners().get('tap')
+            if funcs:
+                tap = Event('tap', source=hits[0], target=drawable, pos=event.pos)
+                for func in funcs:
+                    func(tap)
+                return
+
     def setup(self, parent):
         for object in self.objects:
             object.setup(parent)
 
+    def mark_dirty(self):
+        for object in self.objects:
+            object.mark_dirty()
+
+    def refresh(self):
+        for object in self.objects:
+            if object.visible:
+                object.refresh()
+
     def draw(self, surface):
         for object in self.objects:
             if object.visible:
-                object.draw(surface)
+                object.composite(surface)
 
 
 class App(EventHandler):
@@ -40,9 +124,11 @@ class App(EventHandler):
         self.activities = {}
         self.mainactivity = 'main'
         self.current_activity = None
-        self.folder = ('apps' + os.sep + name.lower() + os.sep).replace(' ', '_')
+        self.folder = app_folder(name)
         EventHandler.__init__(self)
         self.started = False
+        self.listeners_version = None
+        self.merged_listeners = {}
 
     def start(self, parent):
         self.parent = parent
@@ -53,23 +139,32 @@ class App(EventHandler):
         for activity in args:
             self.activities[activity.name] = activity
 
+    def refresh(self):
+        self.current_activity.refresh()
+
     def draw(self, surface):
         self.current_activity.draw(surface)
 
     def get_event_listeners(self):
-        d1 = self.event_listeners.copy()
-        d1_keys = d1.keys()
-        d2 = self.current_activity.get_event_listeners().items()
-        for key, value in d2:
-            if key in d1_keys:
-                d1[key] += value
-            else:
-                d1[key] = value
-        return d1
+        """The listeners of the app merged with those of the current activity.
+        The merged dict is cached until a listener is added or the activity switches.
+        """
+        if self.listeners_version != EventListener.version:
+            listeners = {tag: list(funcs) for tag, funcs in self.event_listeners.items()}
+            if self.current_activity:
+                for tag, funcs in self.current_activity.get_event_listeners().items():
+                    listeners[tag] = listeners.get(tag, []) + funcs
+            self.merged_listeners = listeners
+            self.listeners_version = EventListener.version
+        return self.merged_listeners
 
     def set_activity(self, act_name):
+        if self.current_activity:
+            self.current_activity.mark_dirty()
         self.current_activity = self.activities[act_name]
         self.current_activity.setup(self.parent)
+        self.current_activity.mark_dirty()
+        EventListener.version += 1
 
 
 class Overlay(App):
@@ -0,0 +1,118 @@
+"""Process-wide cache of images loaded from disk."""
+import os
+
+import pygame
+
+from .cache import SurfaceCache
+
+
+class SurfaceAtlas:
+    """Packs surfaces of tile_size into one surface and hands out subsurfaces of it.
+    When the atlas is full it is copied to a larger one; subsurfaces handed out before keep working.
+    """
+    def __init__(self, tile_size, columns=8):
+        self.tile_size = tuple(tile_size)
+        self.columns = columns
+        self.rows = 0
+        self.surface = None
+        self.tiles = {}  # key -> index of the tile
+        self.free = []  # indices of removed tiles, used again first
+
+    def tile_rect(self, index):
+        width, height = self.tile_size
+        return pygame.Rect(index % self.columns * width, index // self.columns * height, width, height)
+
+    def get(self, key):
+        if key in self.tiles:
+            return self.surface.subsurface(self.tile_rect(self.tiles[key]))
+        return None
+
+    def add(self, key, surface):
+        """Put surface in the tile of key, replacing the surface that was there."""
+        if key in self.tiles:
+            index = self.tiles[key]
+        elif self.free:
+            index = self.free.pop()
+        else:
+            index = len(self.tiles)
+        if index // self.columns >= self.rows:
+            self.grow()
+        rect = self.tile_rect(index)
+        self.surface.fill((0, 0, 0, 0), rect)
+        self.surface.blit(surface, rect)
+        self.tiles[key] = index
+        return self.surface.subsurface(rect)
+
+    def remove(self, key):
+        if key in self.tiles:
+            index = self.tiles.pop(key)
+            self.surface.fill((0, 0, 0, 0), self.tile_rect(index))
+            self.free.append(index)
+
+    def grow(self):
+        self.rows = max(1, self.rows * 2)
+        width, height = self.tile_size
+        surface = pygame.Surface((self.columns * width, self.rows * height), pygame.SRCALPHA).convert_alpha()
+        surface.fill((0, 0, 0, 0))
+        if self.surface:
+            surface.blit(self.surface, (0, 0))
+        self.surface = surface
+
+
+class AssetCache:
+    """Images converted to the display format, keyed by (path, size).
+    Every size an image is shown at is scaled once. When the file on disk changes,
+    all cached sizes of it are dropped. Cached surfaces are shared, so never draw on them.
+    """
+    def __init__(self, max_bytes=4 * 1024 * 1024):
+        self.surfaces = SurfaceCache(max_bytes)
+        self.mtimes = {}  # path -> modification time of the file when its surfaces were cached
+        self.atlases = {}  # size -> SurfaceAtlas with the icons of that size
+
+    def check(self, path):
+        """Drop everything cached of path if the file changed since it was cached."""
+        mtime = os.path.getmtime(path)
+        if self.mtimes.get(path) != mtime:
+            self.invalidate(path)
+            self.mtimes[path] = mtime
+
+    def load(self, path, size=None):
+        """The image at path, scaled to size (width, height) if it is given."""
+        self.check(path)
+        key = (path, tuple(size) if size else None)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            if size:
+                surface = pygame.transform.scale(self.load(path), key[1])
+            else:
+                surface = pygame.image.load(path).convert_alpha()
+            self.surfaces.put(key, surface)
+        return surface
+
+    def icon(self, path, size):
+        """The image at path scaled to size x size, as part of the atlas of all icons of that size."""
+        self.check(path)
+        atlas = self.atlases.setdefault(size, SurfaceAtlas((size, size)))
+        tile = atlas.get(path)
+        if tile is None:
+            # not through load(), the tile is the only copy that is kept
+            tile = atlas.add(path, pygame.transform.scale(pygame.image.load(path).convert_alpha(), (size, size)))
+        return tile
+
+    def invalidate(self, path):
+        self.surfaces.remove_where(lambda key: key[0] == path)
+        for atlas in self.atlases.values():
+            atlas.remove(path)
+        self.mtimes.pop(path, None)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.mtimes.clear()
+        self.atlases.clear()
+
+    def stats(self):
+        return dict(self.surfaces.stats(), files=len(self.mtimes),
+                    icons=sum(len(atlas.tiles) for atlas in self.atlases.values()))
+
+
+assets = AssetCache()
@@ -0,0 +1,71 @@
+"""Bounded caches for rendered surfaces."""
+from collections import OrderedDict
+
+
+class SurfaceCache:
+    """Least recently used cache of pygame surfaces with a memory budget in bytes.
+    Cached surfaces are shared, so they must never be drawn on.
+    """
+    def __init__(self, max_bytes=2 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.surfaces = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self.surfaces
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    @staticmethod
+    def surface_size(surface):
+        return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+    def get(self, key):
+        surface = self.surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+        return surface
+
+    def put(self, key, surface):
+        if key in self.surfaces:
+            self.remove(key)
+        size = self.surface_size(surface)
+        if size > self.max_bytes:
+            return surface
+        self.surfaces[key] = surface
+        self.bytes += size
+        self.shrink()
+        return surface
+
+    def remove(self, key):
+        self.bytes -= self.surface_size(self.surfaces.pop(key))
+
+    def remove_where(self, test):
+        """Remove every entry whose key passes test(key)."""
+        for key in [key for key in self.surfaces if test(key)]:
+            self.remove(key)
+
+    def shrink(self):
+        while self.bytes > self.max_bytes:
+            key, surface = self.surfaces.popitem(last=False)
+            self.bytes -= self.surface_size(surface)
+            self.evictions += 1
+
+    def resize(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.shrink()
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                    entries=len(self.surfaces), bytes=self.bytes, max_bytes=self.max_bytes)
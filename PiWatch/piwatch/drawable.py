@@ -1,11 +1,37 @@
 """This file defines the abstract classes which provide basic component functionality."""
 from piwatch.base_functions import classproperty
+from .event import EventListener
+from .render import damage
 import pygame
 
+try:
+    import numpy
+    import pygame.surfarray
+except ImportError:
+    numpy = None
+
+
+def tint_alpha(image, alpha):
+    """Return a copy of image with the alpha of every pixel scaled by alpha/255.
+    Uses NumPy when available. The fallback blend may round one step differently.
+    """
+    surface = image.copy()
+    if not surface.get_flags() & pygame.SRCALPHA:
+        return surface
+    if numpy is not None:
+        pixels = pygame.surfarray.pixels_alpha(surface)
+        pixels[...] = pixels.astype(numpy.uint16) * alpha // 255
+        del pixels  # unlocks the surface
+    else:
+        surface.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+    return surface
+
 
 # All drawable classes must inherit from this class
-class Drawable:
-    """Base class for drawables, takes an AttrSet object and additional kwargs as arguments"""
+class Drawable(EventListener):
+    """Base class for drawables, takes an AttrSet object and additional kwargs as arguments.
+    Listeners for 'tap' are called when the drawable is clicked (see Activity.dispatch_tap).
+    """
     DEFAULTATTRS = dict(
         bg_color=None,
         position=('center', 0, 0),
@@ -34,6 +60,14 @@ class Drawable:
             if self.bg_color and len(self.bg_color) == 3:
                 self.bg_color += (255,)
         self.image = None
+        self.container = None  # the Group this drawable is a child of
+        self.slot = None  # the (rect, alignment) the container last placed this drawable in
+        self.hit_index = None  # the HitIndex of the Activity this drawable is in
+        self.z = ()  # indices from the Activity down to this drawable, larger is drawn on top
+        self.offset = (0, 0)  # moves the drawn drawable without changing its layout, see animation.py
+        self.alpha = 255
+        self.snapshot = None  # (surface, rect) of the drawable, blitted while offset or alpha is set
+        EventListener.__init__(self)
 
     def set_attrs(self, attrdict):
         for attr, value in attrdict.items():
@@ -44,13 +78,23 @@ class Drawable:
         self.full_render()
 
     def update(self, **kwargs):
+        self.mark_dirty()
+        size = self.get_standalone_rect().size if self.image else None
+        self.apply_update(kwargs)
+        if self.container and self.image and self.get_standalone_rect().size != size:
+            self.container.child_resized()
+        self.drop_snapshot()
+        self.mark_dirty()
+
+    def apply_update(self, kwargs):
         set_pos, set_fg, set_bg, full_render = False, False, False, False
         if kwargs:
             self.set_attrs(kwargs)
         else:
             self.full_render()
             return
-        if not {'message', 'font', 'size_x', 'size_y', 'filename', 'size'}.isdisjoint(set(kwargs.keys())):
+        if not {'message', 'font', 'size_x', 'size_y', 'filename', 'size', 'width', 'max_lines', 'line_spacing',
+                'ellipsis', 'align'}.isdisjoint(set(kwargs.keys())):
             full_render = True
         else:
             if 'position' in kwargs.keys():
@@ -73,17 +117,37 @@ class Drawable:
             self.full_render()
             return
         if set_pos:
-            self.set_position()
+            self.place()
         if set_fg:
             self.create_fg_surf()
         if set_bg:
             self.create_bg_surf()
 
+    def mark_dirty(self):
+        """Record the area currently covered by this drawable as changed."""
+        for rect in (getattr(self, 'bg_rect', None), getattr(self, 'fg_rect', None)):
+            if rect:
+                damage.add(rect)
+                if self.offset != (0, 0):
+                    damage.add(rect.move(self.offset))
+
+    def refresh(self):
+        """Called every frame before drawing. Time dependent drawables update themselves here."""
+        pass
+
     def full_render(self):
         self.render_image()
-        self.set_position()
+        self.place()
         self.create_surfaces()
 
+    def place(self):
+        """Position the drawable on the screen, or in the slot its container gave it.
+        If the size changed, the container places it again when it relayouts."""
+        if self.container and self.slot:
+            self.set_pos_from_rect(*self.slot)
+        else:
+            self.set_position()
+
     def set_position(self):
         self.fg_rect = self.image.get_rect()
         self.parent_rect = self.parent.get_rect()
@@ -103,6 +167,7 @@ class Drawable:
             self.bg_rect.center = self.fg_rect.center
         else:
             self.bg_rect = self.fg_rect
+        self.reindex()
 
     def get_standalone_rect(self):
         rect = self.image.get_rect()
@@ -113,6 +178,7 @@ class Drawable:
         return pygame.Rect(0, 0, rect.width, rect.height)
 
     def set_pos_from_rect(self, rect, alignment):
+        self.slot = (rect, alignment)
         self.bg_rect = self.get_standalone_rect()
         if self.padding and self.fixed_size:
             raise AttributeError("Drawable " + str(type(self)) + " can't have both padding and fixed_size attributes")
@@ -129,6 +195,7 @@ class Drawable:
         else:
             setattr(self.bg_rect, alignment, getattr(rect, alignment))
             self.fg_rect = self.bg_rect
+        self.reindex()
 
     def create_bg_surf(self):
         """Create the surface that represents the background of the object."""
@@ -142,13 +209,7 @@ class Drawable:
         """Create the surface that represents the foreground of the object."""
         if self.image:
             if len(self.color) == 4 and self.color[3] != 255:
-                self.fg_surf = self.image.copy()
-                pixelarray = pygame.PixelArray(self.fg_surf)
-                for x in range(self.image.get_width()):
-                    for y in range(self.image.get_height()):
-                        pixel = self.image.unmap_rgb(pixelarray[x, y])
-                        if not pixel[3] == 0:
-                            pixelarray[x, y] = self.image.map_rgb(pixel[:3] + (int(pixel[3] * self.color[3] / 255),))
+                self.fg_surf = tint_alpha(self.image, self.color[3])
             else:
                 self.fg_surf = self.image
 
@@ -162,9 +223,68 @@ class Drawable:
         if hasattr(self, 'fg_surf') and self.fg_surf:
             surface.blit(self.fg_surf, self.fg_rect)
 
+    def composite(self, surface):
+        """Draw the drawable, or a snapshot of it moved by offset and faded by alpha.
+        Containers call this instead of draw(), so animating never renders the drawable again.
+        """
+        if self.offset == (0, 0) and self.alpha == 255:
+            self.draw(surface)
+            return
+        if self.snapshot is None:
+            self.snapshot = self.take_snapshot()
+        image, rect = self.snapshot
+        image.set_alpha(self.alpha)
+        surface.blit(image, rect.move(self.offset))
+
+    def take_snapshot(self):
+        canvas = pygame.Surface(self.parent.get_size(), pygame.SRCALPHA)
+        canvas.fill((0, 0, 0, 0))
+        self.draw(canvas)
+        rect = self.bg_rect.union(self.fg_rect).clip(canvas.get_rect())
+        return canvas.subsurface(rect).copy(), rect
+
+    def drop_snapshot(self):
+        """Forget the snapshots of this drawable and its containers, after it changed."""
+        drawable = self
+        while drawable is not None:
+            drawable.snapshot = None
+            drawable = drawable.container
+
+    def transform(self, offset=(0, 0), alpha=255):
+        """Draw the drawable moved by offset and with alpha, without a relayout or render."""
+        offset = tuple(offset)
+        if offset == self.offset and alpha == self.alpha:
+            return
+        self.mark_dirty()
+        self.offset = offset
+        self.alpha = alpha
+        if offset == (0, 0) and alpha == 255:
+            self.snapshot = None
+        self.mark_dirty()
+
     def check_collision(self, point):
         return self.bg_rect.collidepoint(point)
 
+    @property
+    def shown(self):
+        """Whether this drawable and all of its containers are visible."""
+        return self.visible and (not self.container or self.container.shown)
+
+    def index_into(self, hit_index, z):
+        self.hit_index = hit_index
+        self.z = z
+        self.reindex()
+
+    def reindex(self):
+        """Tell the hit index where this drawable is, after bg_rect changed."""
+        if self.hit_index is not None and hasattr(self, 'bg_rect'):
+            self.hit_index.update(self, self.bg_rect)
+
+    def unindex(self):
+        if self.hit_index is not None:
+            self.hit_index.remove(self)
+            self.hit_index = None
+
     def render_image(self):
         raise NotImplementedError("Render Image is specific for subclasses and needs to be defined.")
 
@@ -1,9 +1,15 @@
 """Event classes"""
+import collections
 import datetime
 import sys
+import threading
 
 import pygame
 
+from .profiler import profiler
+from .scheduler import scheduler
+from .scheduler import timers
+
 if sys.platform == 'linux':
     # Raspberry Pi GPIO setup
     import RPi.GPIO as GPIO
@@ -14,6 +20,8 @@ if sys.platform == 'linux':
     GPIO.add_event_detect(12, GPIO.RISING)
     GPIO.add_event_detect(16, GPIO.RISING)
     GPIO.add_event_detect(18, GPIO.RISING)
+    for pin in (12, 16, 18):
+        GPIO.add_event_callback(pin, lambda channel: scheduler.wake())
 
 
 class Event:
@@ -28,25 +36,100 @@ class Event:
 
 
 class Eventqueue:
-    def __init__(self, link):
-        self.events = []
+    """Events can be added from any thread. They are collected in a bounded deque
+    and moved to the batch returned by Eventqueue.events by the thread that reads it.
+    When the deque is full, the overflow policy decides what happens:
+        'drop-oldest': the oldest event that was not read yet is dropped
+        'coalesce': an unread event with the same tag and target is replaced, else drop-oldest
+        'block': the adding thread waits for the main loop (the main thread itself never waits)
+    """
+    OVERFLOW_POLICIES = ('drop-oldest', 'coalesce', 'block')
+
+    def __init__(self, link, capacity=1024, overflow='drop-oldest'):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError("Overflow policy must be one of {}, it was {}".format(self.OVERFLOW_POLICIES, overflow))
+        self.capacity = capacity
+        self.overflow = overflow
+        # with drop-oldest, the deque drops events itself
+        self.incoming = collections.deque(maxlen=capacity if overflow == 'drop-oldest' else None)
+        self.batch = []
+        self.lock = threading.Condition()
+        self.dropped = 0
         self.time = datetime.datetime.now().time()
         self.link = link
+        self.dispatch_key = None
+        self.dispatch_table = {}
+
+    @property
+    def events(self):
+        self.drain()
+        return self.batch
+
+    def put(self, event):
+        if self.overflow == 'drop-oldest':
+            with self.lock:  # so two adding threads can't both miss that the deque is full
+                if self.capacity and len(self.incoming) >= self.capacity:
+                    self.dropped += 1
+                self.incoming.append(event)  # the deque drops the oldest event itself
+        elif not self.capacity or len(self.incoming) < self.capacity:
+            self.incoming.append(event)
+        elif self.overflow == 'block' and threading.current_thread() is not threading.main_thread():
+            with self.lock:
+                while len(self.incoming) >= self.capacity:
+                    scheduler.wake()  # an idle main loop would never drain the queue otherwise
+                    self.lock.wait(0.1)
+                self.incoming.append(event)
+        else:
+            with self.lock:
+                self.dropped += 1
+                old_event = None
+                if self.overflow == 'coalesce':
+                    for queued in self.incoming:
+                        if queued.tag == event.tag and queued.target is event.target:
+                            old_event = queued
+                            break
+                try:
+                    if old_event is None:
+                        self.incoming.popleft()
+                    else:
+                        self.incoming.remove(old_event)
+                except (IndexError, ValueError):
+                    pass  # the reading thread took it in the meantime, so there is room now
+                self.incoming.append(event)
 
     def add(self, *args, **kwargs):
         if len(args) == 1 and type(args[0]) is str:
             if 'data' in kwargs.keys():
-                self.events.append(Event(args[0], data=kwargs['data'], source=self.link))
+                self.put(Event(args[0], data=kwargs['data'], source=self.link))
             else:
-                self.events.append(Event(args[0], source=self.link))
+                self.put(Event(args[0], source=self.link))
         else:
             for event in args:
                 if not hasattr(event, 'source'):
                     event.source = self.link
-                self.events.append(event)
+                self.put(event)
+        if threading.current_thread() is not threading.main_thread():
+            scheduler.wake()
+
+    def drain(self):
+        """Move the events added by other threads to the batch. Only the reading thread calls this."""
+        try:
+            while True:
+                self.batch.append(self.incoming.popleft())
+        except IndexError:
+            pass
+        if self.overflow == 'block':
+            with self.lock:
+                self.lock.notify_all()
+
+    def take(self):
+        """Return all events and empty the queue."""
+        self.drain()
+        events, self.batch = self.batch, []
+        return events
 
     def clear(self):
-        self.events = []
+        self.batch = []
 
     def handle_events(self):
         new_time = datetime.datetime.now().time()
@@ -72,6 +155,10 @@ class Eventqueue:
                 self.add(Event('mouse down', pos=event.pos))
                 print("mouse up at {}".format(event.pos))
 
+            elif event.type == pygame.MOUSEMOTION and event.buttons[0]:
+                # only while touching, the mouse of a desktop would flood the queue otherwise
+                self.add(Event('mouse motion', pos=event.pos, data=event.rel))
+
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     pygame.quit()
@@ -82,6 +169,8 @@ class Eventqueue:
                     self.add('main start app', data='Home')
                 elif event.key == pygame.K_z:
                     self.add('main start app', data='appdrawer')
+                elif event.key == pygame.K_p:
+                    self.add('main dump trace')
 
             elif event.type == pygame.QUIT:
                 sys.exit()
@@ -92,26 +181,41 @@ class Eventqueue:
                 queue = handler
             else:
                 queue = handler.eventqueue
-            self.events += queue.events
             if clear:
-                queue.clear()
+                self.batch += queue.take()
+            else:
+                self.batch += queue.events
+
+    def get_dispatch_table(self, targets):
+        """Return a dict from tag to the listeners of all targets, in the order of the targets.
+        It is only rebuilt when the targets change or a listener is registered somewhere.
+        """
+        key = (targets, EventListener.version)
+        if key != self.dispatch_key:
+            table = {}
+            for target in targets:
+                for tag, funcs in target.get_event_listeners().items():
+                    table.setdefault(tag, []).extend(funcs)
+            self.dispatch_table = table
+            self.dispatch_key = key
+        return self.dispatch_table
 
     def broadcast(self, *targets, clear=True):
         for event in self.events:
             if not event: continue
             if event.target:
-                for func in event.target.get_event_listeners()[event.tag]:
-                    func(event)
+                funcs = event.target.get_event_listeners().get(event.tag, ())
             else:
-                for target in targets:
-                    if event.tag in target.get_event_listeners().keys():
-                        for func in target.get_event_listeners()[event.tag]:
-                            func(event)
+                # checked for every event, because listeners can switch the activity
+                funcs = self.get_dispatch_table(targets).get(event.tag, ())
+            profiler.call_listeners(funcs, event)
         if clear:
             self.clear()
 
 
 class EventListener:
+    version = 0  # increased whenever the listeners of any EventListener change
+
     def __init__(self):
         self.event_listeners = {}
 
@@ -120,6 +224,7 @@ class EventListener:
             if event_type not in self.event_listeners.keys():
                 self.event_listeners[event_type] = []
             self.event_listeners[event_type].append(func)
+            EventListener.version += 1
             return func
         return add_listener
 
@@ -132,3 +237,21 @@ class EventHandler(EventListener):
         self.eventqueue = Eventqueue(self)
         EventListener.__init__(self)
 
+    def timed_event(self, event, data=None):
+        if type(event) is str:
+            return lambda: Event(event, source=self, target=self, data=data)
+        return lambda: event
+
+    def schedule(self, delay, event, data=None):
+        """Send event (an Event or a tag) after delay seconds. Tags are sent to this handler only.
+        Returns a timer that can be passed to cancel()."""
+        return timers.schedule(delay, self.timed_event(event, data))
+
+    def every(self, interval, event, data=None):
+        """Send event (an Event or a tag) every interval seconds, until it is cancelled."""
+        return timers.schedule(interval, self.timed_event(event, data), interval=interval)
+
+    def cancel(self, timer):
+        if timer:
+            timer.cancel()
+
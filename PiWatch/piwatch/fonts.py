@@ -0,0 +1,56 @@
+"""Process-wide registry of freetype fonts, so font files are only read once."""
+import io
+import os
+
+import pygame.freetype
+import pygame.sysfont
+
+
+class FontRegistry:
+    """Hands out pygame.freetype.Font objects keyed by (name, size, style).
+    Font files are read from resources/fonts once and shared by every Text.
+    Names that are not in resources/fonts are looked up as a system font once.
+    """
+    def __init__(self, folder=None):
+        self.folder = folder or os.path.join(os.getcwd(), 'resources', 'fonts')
+        self.files = {}  # name -> contents of the font file, None for the default font
+        self.fonts = {}  # (name, size, style) -> pygame.freetype.Font
+        self.hits = 0
+        self.misses = 0
+
+    def load_file(self, name):
+        if name not in self.files:
+            path = os.path.join(self.folder, name + '.ttf')
+            if not os.path.isfile(path):
+                path = pygame.sysfont.match_font(name)
+            if path:
+                with open(path, 'rb') as file:
+                    self.files[name] = file.read()
+            else:
+                self.files[name] = None
+        return self.files[name]
+
+    def get(self, name, size, style=pygame.freetype.STYLE_DEFAULT):
+        key = (name, size, style)
+        if key in self.fonts:
+            self.hits += 1
+            return self.fonts[key]
+        self.misses += 1
+        data = self.load_file(name)
+        font = pygame.freetype.Font(io.BytesIO(data) if data else None, size)
+        if style != pygame.freetype.STYLE_DEFAULT:
+            font.style = style
+        self.fonts[key] = font
+        return font
+
+    def preload(self):
+        """Read every font in the fonts folder, so no file is opened after boot."""
+        for file in os.listdir(self.folder):
+            if file.split('.')[-1] == 'ttf':
+                self.load_file('.'.join(file.split('.')[:-1]))
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, files=len(self.files), fonts=len(self.fonts))
+
+
+fonts = FontRegistry()
@@ -0,0 +1,57 @@
+"""Spatial index which finds the drawables at a point on the screen without checking all of them."""
+import pygame
+
+
+class HitIndex:
+    """Uniform grid of buckets over the screen. Every drawable is stored in the buckets its bg_rect covers,
+    together with its z, a tuple of indices from the Activity down to the drawable. A larger z is drawn on top.
+    """
+    def __init__(self, screen_rect=(0, 0, 320, 240), bucket_size=32):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.bucket_size = bucket_size
+        self.buckets = {}  # (column, row) -> set of drawables
+        self.entries = {}  # drawable -> (rect, keys of its buckets)
+
+    def bucket_keys(self, rect):
+        rect = rect.clip(self.screen_rect)
+        if not rect.width or not rect.height:
+            return ()
+        size = self.bucket_size
+        return [(column, row)
+                for column in range(rect.left // size, (rect.right - 1) // size + 1)
+                for row in range(rect.top // size, (rect.bottom - 1) // size + 1)]
+
+    def update(self, drawable, rect):
+        """Insert drawable, or move it if it is already in the index."""
+        entry = self.entries.get(drawable)
+        if entry and entry[0] == rect:
+            return
+        self.remove(drawable)
+        keys = self.bucket_keys(rect)
+        for key in keys:
+            self.buckets.setdefault(key, set()).add(drawable)
+        self.entries[drawable] = (pygame.Rect(rect), keys)
+
+    def remove(self, drawable):
+        entry = self.entries.pop(drawable, None)
+        if entry:
+            for key in entry[1]:
+                self.buckets[key].discard(drawable)
+
+    def clear(self):
+        self.buckets = {}
+        self.entries = {}
+
+    def candidates(self, pos):
+        key = (pos[0] // self.bucket_size, pos[1] // self.bucket_size)
+        return [drawable for drawable in self.buckets.get(key, ())
+                if self.entries[drawable][0].collidepoint(pos) and drawable.shown]
+
+    def hit_test_all(self, pos):
+        """All visible drawables at pos, the top one first."""
+        return sorted(self.candidates(pos), key=lambda drawable: drawable.z, reverse=True)
+
+    def hit_test(self, pos):
+        """The visible drawable at pos that is drawn on top, None if there is none."""
+        hits = self.candidates(pos)
+        return max(hits, key=lambda drawable: drawable.z) if hits else None
@@ -1,6 +1,7 @@
 """This file provides the text classes for PiWatch-apps."""
 import pygame
 
+from .assets import assets
 from .drawable import *
 
 
@@ -12,31 +13,33 @@ class Image(Drawable):
         size_y=None
     )
 
-    def setup(self, parent):
-        self.file = pygame.image.load(self.filename).convert_alpha()
-        self.image = self.file
-        self.fg_rect = self.image.get_rect()
-        self.render_image()
-        super().setup(parent)
-
     def render_image(self):
+        self.file = assets.load(self.filename)
+        width, height = self.file.get_size()
         if not (self.size_x or self.size_y):
-            size_x = self.fg_rect.width
-            size_y = self.fg_rect.height
+            size_x = width
+            size_y = height
         elif self.size_x and not self.size_y:
             size_x = self.size_x
-            size_y = int(self.size_x * self.fg_rect.height / self.fg_rect.width)
+            size_y = int(self.size_x * height / width)
         elif self.size_y and not self.size_x:
-            size_x = int(self.size_y * self.fg_rect.width / self.fg_rect.height)
+            size_x = int(self.size_y * width / height)
             size_y = self.size_y
         else:
             size_x = self.size_x
             size_y = self.size_y
-        self.image = pygame.transform.scale(self.file, (size_x, size_y))
+        if (size_x, size_y) == (width, height):
+            self.image = self.file
+        else:
+            self.image = assets.load(self.filename, (size_x, size_y))
 
-    def update(self, **kwargs):
-        if 'filename' in kwargs.keys():
-            self.filename = kwargs['filename']
-            self.file = pygame.image.load(self.filename)
-            del kwargs['filename']
-        super().update(**kwargs)
+
+class Icon(Image):
+    """A square image of size x size pixels. All icons of a size are packed into one atlas surface."""
+    DEFAULTATTRS = dict(
+        Image.DEFAULTATTRS,
+        size=32
+    )
+
+    def render_image(self):
+        self.image = assets.icon(self.filename, self.size)
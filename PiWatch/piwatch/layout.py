@@ -1,32 +1,91 @@
 from .drawable import *
+from .cache import SurfaceCache
 import pygame
 import itertools
 
 
 class Group(Drawable):
+    """Groups keep their layout until a child changes size (see child_resized).
+    The relayout is done lazily, in update() or before the next frame is drawn.
+    """
     DEFAULTATTRS = dict(
         Drawable.DEFAULTATTRS,
         children=[]
     )
 
+    def __init__(self, *attrs, **kwargs):
+        super().__init__(*attrs, **kwargs)
+        self.children = list(getattr(self, 'children', []))  # don't share the default list
+        self.measured_fg = None
+        self.layout_dirty = True
+
+    @property
+    def items(self):
+        return self.children
+
+    def keyed_items(self):
+        """The items with their z relative to this group."""
+        return (((index,), child) for index, child in enumerate(self.children))
+
     def add(self, *args):
         for child in args:
             self.children.append(child)
-            if hasattr(self, 'parent'):
-                child.setup(self.parent)
+            child.container = self
+        self.adopt(args)
+
+    def adopt(self, new_items):
+        """Index and set up items that were just added."""
+        if self.hit_index is not None:
+            self.index_into(self.hit_index, self.z)
         if hasattr(self, 'parent'):
-            self.set_position()
-            self.create_bg_surf()
+            for child in new_items:
+                child.setup(self.parent)
+            self.child_resized()
+            if not self.container:
+                self.arrange()
 
     def clear(self):
+        self.mark_dirty()
+        for child in self.items:
+            child.unindex()
         self.children = []
+        self.child_resized()
+
+    def index_into(self, hit_index, z):
+        super().index_into(hit_index, z)
+        for key, child in self.keyed_items():
+            child.index_into(hit_index, z + key)
+
+    def unindex(self):
+        for child in self.items:
+            child.unindex()
+        super().unindex()
 
     def setup(self, parent):
         self.parent = parent
-        for child in self.children:
+        for child in self.items:
+            child.container = self
             child.setup(parent)
-        self.set_position()
-        self.create_bg_surf()
+        self.arrange()
+
+    def child_resized(self):
+        """Called when the size of a child changed, the layout is redone before the next frame."""
+        self.measured_fg = None
+        self.layout_dirty = True
+        if self.container:
+            self.container.child_resized()
+
+    def arrange(self):
+        self.mark_dirty()
+        self.place()
+        self.fit_bg_surf()
+        self.layout_dirty = False
+        self.mark_dirty()
+
+    def fit_bg_surf(self):
+        """Recreate the background surface if its size no longer matches."""
+        if self.bg_color and (getattr(self, 'bg_surf', None) is None or self.bg_surf.get_size() != self.bg_rect.size):
+            self.create_bg_surf()
 
     def render_image(self):
         for child in self.children:
@@ -37,12 +96,21 @@ class Group(Drawable):
             child.set_position()
         self.bg_rect = self.children[0].bg_rect.unionall([child.bg_rect for child in self.children[1:]])
         print(self.bg_rect)
+        self.reindex()
+
+    def refresh(self):
+        if self.layout_dirty and hasattr(self, 'parent'):
+            self.arrange()
+        for child in self.items:
+            if child.visible:
+                child.refresh()
 
     def draw(self, surface):
         if hasattr(self, 'bg_surf') and self.bg_surf:
             surface.blit(self.bg_surf, self.bg_rect)
         for child in self.children:
-            child.draw(surface)
+            if child.visible:
+                child.composite(surface)
 
 
 class List(Group):
@@ -55,15 +123,38 @@ class List(Group):
     )
 
     def update(self, **kwargs):
+        """Relayout if a child changed size. Changing only the visibility never relayouts."""
         if kwargs:
+            size = self.get_standalone_rect().size
             self.set_attrs(kwargs)
-        if hasattr(self, 'bg_color') and self.bg_color:
-            if len(self.bg_color) == 3:
-                self.color += 255
-                self.create_bg_surf()
-        self.render_image()
-        self.set_position()
-        self.create_bg_surf()
+            if hasattr(self, 'bg_color') and self.bg_color:
+                if len(self.bg_color) == 3:
+                    self.bg_color += (255,)
+            if type(self.padding) is int:
+                self.padding = (self.padding, self.padding)
+            if type(self.fixed_size) is int:
+                self.fixed_size = (self.fixed_size, self.fixed_size)
+            if set(kwargs.keys()) != {'visible'}:
+                self.measured_fg = None
+                self.layout_dirty = True
+                if self.container and self.get_standalone_rect().size != size:
+                    self.container.child_resized()
+        if not hasattr(self, 'parent'):
+            return
+        self.drop_snapshot()
+        if 'bg_color' in kwargs:
+            self.create_bg_surf()
+        if self.layout_dirty:
+            self.arrange()
+        elif 'visible' in kwargs:
+            self.mark_dirty()
+
+    def child_resized(self):
+        size = self.get_standalone_rect().size
+        self.measured_fg = None
+        self.layout_dirty = True
+        if self.container and self.get_standalone_rect().size != size:
+            self.container.child_resized()
 
     def get_standalone_rect(self):
         if self.fixed_size:
@@ -74,6 +165,12 @@ class List(Group):
         return rect
 
     def get_standalone_fg_rect(self):
+        """The size of the children put together, cached until a child changes size."""
+        if self.measured_fg is None:
+            self.measured_fg = self.measure_fg_rect()
+        return self.measured_fg.copy()
+
+    def measure_fg_rect(self):
         if not self.children:
             return pygame.Rect(0, 0, 0, 0)
         try:
@@ -117,6 +214,8 @@ class List(Group):
             self.bg_rect = self.fg_rect
         self.create_bg_surf()
         self.set_pos_from_rect_children()
+        self.layout_dirty = False
+        self.reindex()
 
     def set_pos_from_rect_children(self):
         if self.direction == 'right':
@@ -135,6 +234,7 @@ class List(Group):
                 offset += child_rect.height + self.spacing
 
     def set_pos_from_rect(self, rect, alignment):
+        self.slot = (rect, alignment)
         self.fg_rect = self.get_standalone_fg_rect()
         setattr(self.fg_rect, alignment, getattr(rect, alignment))
         self.set_pos_from_rect_children()
@@ -148,33 +248,34 @@ class List(Group):
             setattr(self.bg_rect, self.alignment, getattr(self.fg_rect, self.alignment))
         else:
             self.bg_rect = self.fg_rect
+        self.fit_bg_surf()
+        self.layout_dirty = False
+        self.reindex()
 
 
 class Grid(List):
+    @property
+    def items(self):
+        return self.flat_children
+
+    def keyed_items(self):
+        return (((row_index, index), item)
+                for row_index, row in enumerate(self.children) for index, item in enumerate(row))
+
     def add(self, *args):
         for row in args:
             self.children.append(row)
             for item in row:
-                if hasattr(self, 'parent'):
-                    item.setup(self.parent)
-        if hasattr(self, 'parent'):
-            self.set_position()
-            self.create_bg_surf()
-
-    def setup(self, parent):
-        self.parent = parent
-        for row in self.children:
-            for item in row:
-                item.setup(parent)
-        self.set_position()
-        self.create_bg_surf()
+                item.container = self
+        self.adopt(itertools.chain.from_iterable(args))
 
     def draw(self, surface):
         if self.bg_color:
             surface.blit(self.bg_surf, self.bg_rect)
         for row in self.children:
             for item in row:
-                item.draw(surface)
+                if item.visible:
+                    item.composite(surface)
 
     def render_image(self):
         for row in self.children:
@@ -182,27 +283,30 @@ class Grid(List):
                 item.render_image()
 
     def get_standalone_rect(self):
+        return self.get_standalone_fg_rect()
+
+    def measure_fg_rect(self):
+        """Measures the grid and the size of one cell, which is as large as the largest item."""
         if not self.children:
             return pygame.Rect(0, 0, 0, 0)
         if self.direction == 'down':
             row_widths = []
             height = 0
+            child_rects = []
             for row in self.children:
                 rects = [item.get_standalone_rect() for item in row]
+                child_rects += rects
                 row_widths.append(max(rect.width for rect in rects) * len(rects) + self.spacing * len(rects[:-1]))
                 height += max(rect.height for rect in rects)
             height += self.spacing * len(self.children[:-1])
             width = max(row_widths)
+            self.cell_size = (max(rect.width for rect in child_rects), max(rect.height for rect in child_rects))
         return pygame.Rect(0, 0, width, height)
 
-    def get_standalone_fg_rect(self):
-        return self.get_standalone_rect()
-
     def set_pos_from_rect_children(self):
         if self.children:
-            child_rects = [item.get_standalone_rect() for row in self.children for item in row]
-            item_height = max(rect.height for rect in child_rects)
-            item_width = max(rect.width for rect in child_rects)
+            self.get_standalone_fg_rect()  # makes sure cell_size is measured
+            item_width, item_height = self.cell_size
             init_offset_x = self.fg_rect.left
             init_offset_y = self.fg_rect.top
             item_offset_x = item_width + self.spacing
@@ -220,3 +324,116 @@ class Grid(List):
     @property
     def flat_children(self):
         return itertools.chain.from_iterable(self.children)
+
+
+class RecyclerList(Drawable):
+    """A vertical list of 'count' rows in a viewport of 'size' pixels, which scrolls when it is dragged.
+    Its cost per frame doesn't depend on count: only the rows in the viewport are drawn, and
+    only when a row comes into view for the first time it is rendered, with a drawable from a
+    small pool. make_row() creates such a drawable and bind_row(row, index) makes it show item index.
+    Rendered rows are cached by index until reload() or invalidate().
+    """
+    DEFAULTATTRS = dict(
+        Drawable.DEFAULTATTRS,
+        size=(280, 200),
+        row_height=40,
+        spacing=5,
+        count=0,
+        make_row=None,
+        bind_row=None,
+        cache_bytes=1024 * 1024
+    )
+
+    def __init__(self, *attrs, **kwargs):
+        super().__init__(*attrs, **kwargs)
+        self.scroll = 0
+        self.pool = []
+        self.row_parent = None
+        self.row_cache = SurfaceCache(max_bytes=self.cache_bytes)
+        self.event_listener('drag')(self.drag)
+
+    @property
+    def row_pitch(self):
+        return self.row_height + self.spacing
+
+    @property
+    def max_scroll(self):
+        return max(0, self.count * self.row_pitch - self.spacing - self.size[1])
+
+    def visible_rows(self):
+        first = self.scroll // self.row_pitch
+        return range(first, min(self.count, (self.scroll + self.size[1]) // self.row_pitch + 1))
+
+    def render_image(self):
+        """Compose the rows in the viewport."""
+        self.image = pygame.Surface(self.size, pygame.SRCALPHA)
+        self.image.fill((0, 0, 0, 0))
+        for index in self.visible_rows():
+            self.image.blit(self.row_surface(index), (0, index * self.row_pitch - self.scroll))
+
+    def row_surface(self, index):
+        surface = self.row_cache.get(index)
+        if surface is None:
+            row = self.row_for(index)
+            self.bind_row(row, index)
+            row.refresh()  # redo the layout if binding changed the size of a child
+            surface = pygame.Surface((self.size[0], self.row_height), pygame.SRCALPHA)
+            surface.fill((0, 0, 0, 0))
+            row.draw(surface)
+            self.row_cache.put(index, surface)
+        return surface
+
+    def row_for(self, index):
+        """The drawable from the pool to render row index with. Rows that share one are never visible together."""
+        if self.row_parent is None:
+            self.row_parent = pygame.Surface((self.size[0], self.row_height))
+        while len(self.pool) < self.size[1] // self.row_pitch + 2:
+            row = self.make_row()
+            row.setup(self.row_parent)
+            self.pool.append(row)
+        return self.pool[index % len(self.pool)]
+
+    def rerender(self):
+        self.mark_dirty()
+        self.render_image()
+        self.create_fg_surf()
+        self.drop_snapshot()
+        self.mark_dirty()
+
+    def scroll_to(self, scroll):
+        scroll = min(max(0, int(scroll)), self.max_scroll)
+        if scroll != self.scroll:
+            self.scroll = scroll
+            if hasattr(self, 'parent'):
+                self.rerender()
+
+    def drag(self, event):
+        self.scroll_to(self.scroll - event.data[1])
+
+    def reload(self, count):
+        """Show count items, the rows are bound again."""
+        self.count = count
+        self.row_cache.clear()
+        self.scroll = min(self.scroll, self.max_scroll)
+        if hasattr(self, 'parent'):
+            self.rerender()
+
+    def invalidate(self, index):
+        """Bind row index again, e.g. after its item changed."""
+        self.row_cache.remove_where(lambda key: key == index)
+        if hasattr(self, 'parent') and index in self.visible_rows():
+            self.rerender()
+
+    def locate(self, pos):
+        """The index of the row at the screen position pos and pos relative to that row, or None."""
+        if not self.bg_rect.collidepoint(pos):
+            return None
+        y = pos[1] - self.fg_rect.top + self.scroll
+        index = y // self.row_pitch
+        if index >= self.count or y % self.row_pitch >= self.row_height:
+            return None
+        return index, (pos[0] - self.fg_rect.left, y % self.row_pitch)
+
+    def index_at(self, pos):
+        location = self.locate(pos)
+        return location[0] if location else None
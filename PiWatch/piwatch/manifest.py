@@ -0,0 +1,123 @@
+"""Knows which apps, overlays and services the apps folder contains, without importing the app modules."""
+import ast
+import importlib.util
+import json
+import os
+
+from .app import app_folder
+
+# the function a module defines for each kind, and the classes that function constructs
+DEFINE_FUNCTIONS = {'apps': 'define_app', 'overlays': 'define_overlay', 'services': 'define_services'}
+CONSTRUCTORS = ('App', 'Overlay', 'Service')
+
+
+class AppInfo:
+    """What the appdrawer needs to show an app that may not be defined yet."""
+    def __init__(self, name, icon=None, module=None):
+        self.name = name
+        self.icon = icon
+        self.module = module
+        self.folder = app_folder(name)
+
+
+def read_definitions(path):
+    """Find the names (and icons) in the App, Overlay and Service calls of every define function.
+    Returns None for a kind if its define function exists but the names can't be read from the source.
+    """
+    with open(path) as file:
+        tree = ast.parse(file.read(), path)
+    definitions = {}
+    for node in tree.body:
+        if not isinstance(node, ast.FunctionDef) or node.name not in DEFINE_FUNCTIONS.values():
+            continue
+        kind = next(kind for kind, function in DEFINE_FUNCTIONS.items() if function == node.name)
+        found = []
+        for call in ast.walk(node):
+            if isinstance(call, ast.Call) and isinstance(call.func, ast.Name) and call.func.id in CONSTRUCTORS:
+                arguments = {keyword.arg: keyword.value for keyword in call.keywords}
+                if call.args:
+                    arguments['name'] = call.args[0]
+                try:
+                    found.append(dict(name=ast.literal_eval(arguments['name']),
+                                      icon=ast.literal_eval(arguments['icon']) if 'icon' in arguments else None))
+                except (KeyError, ValueError):
+                    found = None
+                    break
+        definitions[kind] = found or None
+    return definitions
+
+
+class AppManifest:
+    """The apps, overlays and services in a folder, cached in a JSON file in that folder.
+    A module is only read again when its modification time changed. Modules whose names
+    can't be read from the source are imported once to find them.
+    """
+    VERSION = 1
+
+    def __init__(self, folder='apps', path=None):
+        self.folder = folder
+        self.path = path or os.path.join(folder, '.manifest.json')
+        self.modules = {}  # module name -> dict(mtime, apps, overlays, services)
+        self.rebuilt = []  # the modules that were read again by the last load()
+
+    def load(self):
+        """Read the cached manifest and bring it up to date with the folder."""
+        try:
+            with open(self.path) as file:
+                cached = json.load(file)
+            if cached.get('version') != self.VERSION:
+                cached = {}
+        except (OSError, ValueError):
+            cached = {}
+        cached_modules = cached.get('modules', {})
+        self.modules = {}
+        self.rebuilt = []
+        for file in sorted(os.listdir(self.folder)):
+            if file.split('.')[-1] != 'py':
+                continue
+            module = '.'.join(file.split('.')[:-1])
+            mtime = os.path.getmtime(os.path.join(self.folder, file))
+            entry = cached_modules.get(module)
+            if not entry or entry['mtime'] != mtime:
+                entry = self.read_module(module, mtime)
+                self.rebuilt.append(module)
+            self.modules[module] = entry
+        if self.rebuilt or len(cached_modules) != len(self.modules):
+            self.save()
+        return self
+
+    def read_module(self, module, mtime):
+        path = os.path.join(self.folder, module + '.py')
+        entry = dict(mtime=mtime)
+        for kind, definitions in read_definitions(path).items():
+            if definitions is None:
+                definitions = self.define_to_find_names(module, kind)
+            entry[kind] = definitions
+        return entry
+
+    def define_to_find_names(self, module, kind):
+        spec = importlib.util.spec_from_file_location(module, os.path.join(self.folder, module + '.py'))
+        loaded = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(loaded)
+        defined = getattr(loaded, DEFINE_FUNCTIONS[kind])()
+        if not isinstance(defined, (list, tuple)):
+            defined = [defined]
+        return [dict(name=item.name, icon=getattr(item, 'icon', None)) for item in defined]
+
+    def save(self):
+        try:
+            with open(self.path, 'w') as file:
+                json.dump({'version': self.VERSION, 'modules': self.modules}, file, indent=1)
+        except OSError as error:
+            print('Could not save the app manifest:', error)
+
+    def names(self, kind):
+        """Map the name of every app, overlay or service (kind) to an AppInfo."""
+        return {definition['name']: AppInfo(definition['name'], definition['icon'], module)
+                for module, entry in self.modules.items() for definition in entry.get(kind, ())}
+
+    def module_of(self, kind, name):
+        for module, entry in self.modules.items():
+            if any(definition['name'] == name for definition in entry.get(kind, ())):
+                return module
+        raise KeyError('There is no {} called {!r} in {}'.format(kind[:-1], name, self.folder))
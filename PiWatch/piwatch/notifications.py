@@ -0,0 +1,138 @@
+"""The notifications the watch received, kept so apps don't have to ask the phone for them."""
+import collections
+import json
+import os
+import time
+
+
+class Notification:
+    __slots__ = ('app', 'title', 'text', 'time')
+
+    def __init__(self, app, title, text, time):
+        self.app = app
+        self.title = title
+        self.text = text
+        self.time = time  # time.time() when the watch received it
+
+    @property
+    def key(self):
+        return self.app, self.title, self.text
+
+    def __repr__(self):
+        return 'Notification({!r}, {!r}, {!r}, {:.0f})'.format(self.app, self.title, self.text, self.time)
+
+
+class NotificationStore:
+    """The last 'capacity' notifications in the order they were received, with an index by app.
+    A notification with the same app, title and text as a stored one is a duplicate and is not stored again.
+    With a path, every notification is also appended to that file as a line of JSON and open() reads
+    them back. The file is rewritten when it holds more than twice the capacity.
+    """
+    def __init__(self, capacity=200):
+        self.capacity = capacity
+        self.path = None
+        self.ring = collections.deque()  # oldest first
+        self.by_app = {}  # app -> deque of its notifications, oldest first
+        self.keys = {}  # (app, title, text) -> notification
+        self.logged = 0  # lines in the file
+        self.version = 0  # incremented on every change, to check if a rendered list is outdated
+        self.synced_at = None  # time of the last list received from the phone
+
+    def __len__(self):
+        return len(self.ring)
+
+    def open(self, path):
+        """Read the notifications stored in path and append new ones to it."""
+        self.clear()
+        self.path = path
+        self.logged = 0
+        try:
+            with open(path) as file:
+                for line in file:
+                    self.logged += 1
+                    try:
+                        self.insert(Notification(*json.loads(line)))
+                    except (ValueError, TypeError):
+                        pass  # the watch was turned off while it was writing this line
+        except OSError:
+            pass
+        if self.logged > 2 * self.capacity:
+            self.compact()
+        return self
+
+    def add(self, app, title, text='', received=None):
+        """Store a notification, return it or None if it is a duplicate."""
+        if (app, title, text) in self.keys:
+            return None
+        notification = Notification(app, title, text, received or time.time())
+        self.insert(notification)
+        if self.path:
+            self.append_to_log(notification)
+        return notification
+
+    def insert(self, notification):
+        if notification.key in self.keys:
+            return
+        if len(self.ring) >= self.capacity:
+            self.evict()
+        self.ring.append(notification)
+        self.by_app.setdefault(notification.app, collections.deque()).append(notification)
+        self.keys[notification.key] = notification
+        self.version += 1
+
+    def evict(self):
+        oldest = self.ring.popleft()
+        app_notifications = self.by_app[oldest.app]
+        app_notifications.popleft()
+        if not app_notifications:
+            del self.by_app[oldest.app]
+        del self.keys[oldest.key]
+
+    def append_to_log(self, notification):
+        try:
+            with open(self.path, 'a') as file:
+                file.write(json.dumps([notification.app, notification.title, notification.text, notification.time]))
+                file.write('\n')
+            self.logged += 1
+        except OSError as error:
+            print('Could not save the notification:', error)
+        if self.logged > 2 * self.capacity:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the file with only the notifications in the ring."""
+        temporary = self.path + '.tmp'
+        try:
+            with open(temporary, 'w') as file:
+                for notification in self.ring:
+                    file.write(json.dumps([notification.app, notification.title, notification.text,
+                                           notification.time]))
+                    file.write('\n')
+            os.replace(temporary, self.path)
+            self.logged = len(self.ring)
+        except OSError as error:
+            print('Could not compact the notifications:', error)
+
+    def query(self, app=None, since=None, limit=None):
+        """The notifications of app (or of all apps) received after time 'since', newest first.
+        Both the ring and the index are in the order of time, so only the results are visited.
+        """
+        found = []
+        for notification in reversed(self.by_app.get(app, ()) if app is not None else self.ring):
+            if since is not None and notification.time <= since or limit is not None and len(found) >= limit:
+                break
+            found.append(notification)
+        return found
+
+    def apps(self):
+        """The number of stored notifications of every app."""
+        return {app: len(notifications) for app, notifications in self.by_app.items()}
+
+    def clear(self):
+        self.ring.clear()
+        self.by_app.clear()
+        self.keys.clear()
+        self.version += 1
+
+
+notifications = NotificationStore()
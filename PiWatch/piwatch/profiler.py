@@ -0,0 +1,96 @@
+"""Timing of the phases of every frame, for finding out what makes frames slow."""
+import collections
+import json
+import time
+
+# the phases of a frame, in the order they are stacked in the graph, with their colors
+CATEGORIES = collections.OrderedDict([
+    ('import', (120, 120, 255)),
+    ('input', (0, 200, 255)),
+    ('broadcast', (0, 220, 100)),
+    ('main', (255, 220, 0)),
+    ('refresh', (255, 140, 0)),
+    ('draw app', (255, 60, 60)),
+    ('draw overlay', (220, 0, 220)),
+    ('flip', (200, 200, 200)),
+])
+FRAME_BUDGET_MS = 1000 / 15
+
+
+def listener_name(func):
+    func = getattr(func, 'target', func)  # a ThreadedFunction
+    return '{}.{}'.format(getattr(func, '__module__', None), getattr(func, '__name__', repr(func)))
+
+
+class FrameProfiler:
+    """Records how long each phase of the last 'frames' frames took, using time.perf_counter_ns().
+    The main loop wraps every phase in start() and stop(). Both do nothing while the profiler is disabled.
+    """
+    def __init__(self, frames=120):
+        self.enabled = False
+        self.frames = collections.deque(maxlen=frames)
+        self.spans = None  # spans of the current frame: (name, category, start ns, end ns, args)
+        self.frame_start = None
+
+    def start(self):
+        return time.perf_counter_ns() if self.enabled else None
+
+    def stop(self, name, start, category=None, args=None):
+        if start is not None and self.spans is not None:
+            self.spans.append((name, category or name, start, time.perf_counter_ns(), args))
+
+    def begin_frame(self):
+        if self.enabled:
+            self.spans = []
+            self.frame_start = time.perf_counter_ns()
+        else:
+            self.spans = None
+
+    def end_frame(self):
+        if self.spans is not None:
+            self.frames.append((self.frame_start, time.perf_counter_ns(), self.spans))
+            self.spans = None
+
+    def call_listeners(self, funcs, event):
+        """Call every listener with event, timing each of them if the profiler is enabled."""
+        if self.spans is None:
+            for func in funcs:
+                func(event)
+            return
+        for func in funcs:
+            start = time.perf_counter_ns()
+            func(event)
+            self.spans.append((listener_name(func), 'listener', start, time.perf_counter_ns(), {'tag': event.tag}))
+
+    def frame_totals(self):
+        """For every recorded frame, the milliseconds spent in each category."""
+        totals = []
+        for start, end, spans in self.frames:
+            frame = dict.fromkeys(CATEGORIES, 0)
+            for name, category, span_start, span_end, args in spans:
+                if category in frame:
+                    frame[category] += (span_end - span_start) / 1e6
+            frame['total'] = (end - start) / 1e6
+            totals.append(frame)
+        return totals
+
+    def trace_events(self):
+        """The recorded frames in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        events = []
+        for index, (start, end, spans) in enumerate(self.frames):
+            events.append(dict(name='frame', cat='frame', ph='X', ts=start / 1000, dur=(end - start) / 1000,
+                               pid=1, tid=1, args={'index': index}))
+            for name, category, span_start, span_end, args in spans:
+                events.append(dict(name=name, cat=category, ph='X', ts=span_start / 1000,
+                                   dur=(span_end - span_start) / 1000, pid=1, tid=1, args=args or {}))
+        return events
+
+    def dump(self, path=None):
+        """Write the recorded frames to a trace file and return its path."""
+        path = path or 'piwatch-trace-{}.json'.format(time.strftime('%Y%m%d-%H%M%S'))
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, file)
+        return path
+
+
+profiler = FrameProfiler()
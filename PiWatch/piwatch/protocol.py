@@ -0,0 +1,154 @@
+"""The messages between the PiWatch and the phone, framed as netstrings so they survive any chunking.
+
+Every message is one netstring, b'<length>:<payload>,', whose payload is a sequence of netstrings
+with the UTF-8 encoded fields of the message. The first field is the kind of the message, e.g.
+    notification posted, <package of the app>, <title>, <text>
+    notification list, <app>, <title>, <text>, <app>, <title>, <text>, ...
+Fields can contain any character, including '|', ':' and ','.
+"""
+
+MAX_FRAME_SIZE = 1024 * 1024
+MAX_LENGTH_DIGITS = len(str(MAX_FRAME_SIZE))
+
+
+class ProtocolError(ValueError):
+    """The bytes received are not a valid stream of frames, the connection can't be trusted anymore."""
+
+
+def encode_frame(payload):
+    return b'%d:%s,' % (len(payload), payload)
+
+
+def split_frames(data, start=0, end=None):
+    """Yield the payloads of the complete netstrings in data[start:end] and the offset after each of them.
+    Stops at the first incomplete netstring.
+    """
+    end = len(data) if end is None else end
+    while start < end:
+        colon = data.find(b':', start, min(end, start + MAX_LENGTH_DIGITS + 1))
+        if colon == -1:
+            if end - start > MAX_LENGTH_DIGITS or not data[start:end].isdigit():
+                raise ProtocolError('Expected the length of a frame, got {!r}'.format(bytes(data[start:start + 16])))
+            return
+        digits = data[start:colon]
+        if not digits.isdigit():
+            raise ProtocolError('Expected the length of a frame, got {!r}'.format(bytes(digits)))
+        length = int(digits)
+        if length > MAX_FRAME_SIZE:
+            raise ProtocolError('Frame of {} bytes is larger than {} bytes'.format(length, MAX_FRAME_SIZE))
+        comma = colon + 1 + length
+        if comma >= end:
+            return
+        if data[comma] != ord(','):
+            raise ProtocolError('Frame of {} bytes is not followed by a comma'.format(length))
+        yield bytes(data[colon + 1:comma]), comma + 1
+        start = comma + 1
+
+
+class FrameDecoder:
+    """Reassembles frames from the chunks returned by recv(), which can end anywhere in a frame.
+    Only the bytes after the last complete frame are kept, so every byte is parsed once.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add the received bytes and return the payloads of the frames they completed."""
+        self.buffer += data
+        payloads = []
+        consumed = 0
+        for payload, consumed in split_frames(self.buffer):
+            payloads.append(payload)
+        if consumed:
+            del self.buffer[:consumed]
+        return payloads
+
+    def reset(self):
+        self.buffer.clear()
+
+
+class Message:
+    """A message of a kind without a class of its own, kept as its fields."""
+    kind = None
+
+    def __init__(self, kind, *fields):
+        self.kind = kind
+        self.args = list(fields)
+
+    def fields(self):
+        return self.args
+
+    @classmethod
+    def from_fields(cls, kind, fields):
+        return cls(kind, *fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.kind == other.kind and self.fields() == other.fields()
+
+    def __repr__(self):
+        return '{}({!r}, {})'.format(type(self).__name__, self.kind, ', '.join(map(repr, self.fields())))
+
+
+class NotificationPosted(Message):
+    kind = 'notification posted'
+
+    def __init__(self, package, title, text=''):
+        self.package = package
+        self.title = title
+        self.text = text
+
+    @property
+    def app(self):
+        """The name of the app that posted it, e.g. 'whatsapp' for 'com.whatsapp'."""
+        return self.package.split('.')[1] if '.' in self.package else self.package
+
+    def fields(self):
+        return [self.package, self.title, self.text]
+
+    @classmethod
+    def from_fields(cls, kind, fields):
+        if len(fields) != 3:
+            raise ProtocolError('A notification has 3 fields, got {}'.format(len(fields)))
+        return cls(*fields)
+
+
+class NotificationList(Message):
+    kind = 'notification list'
+
+    def __init__(self, notifications):
+        self.notifications = notifications  # (app, title, text) tuples, newest first
+
+    def fields(self):
+        return [field for notification in self.notifications for field in notification]
+
+    @classmethod
+    def from_fields(cls, kind, fields):
+        if len(fields) % 3:
+            raise ProtocolError('A notification list has 3 fields per notification, got {}'.format(len(fields)))
+        return cls([tuple(fields[i:i + 3]) for i in range(0, len(fields), 3)])
+
+
+MESSAGE_TYPES = {cls.kind: cls for cls in (NotificationPosted, NotificationList)}
+
+
+def encode_message(message):
+    """The frame of a Message, or of a message without fields if message is a string."""
+    if isinstance(message, str):
+        message = Message(message)
+    fields = [message.kind] + message.fields()
+    return encode_frame(b''.join(encode_frame(field.encode('utf-8')) for field in fields))
+
+
+def decode_message(payload):
+    fields = []
+    end = 0
+    for field, end in split_frames(payload):
+        try:
+            fields.append(field.decode('utf-8'))
+        except UnicodeDecodeError as error:
+            raise ProtocolError('Field is not valid UTF-8: {}'.format(error))
+    if end != len(payload) or not fields:
+        raise ProtocolError('Message {!r} is not a sequence of fields'.format(payload[:32]))
+    kind = fields[0]
+    return MESSAGE_TYPES.get(kind, Message).from_fields(kind, fields[1:])
+
@@ -0,0 +1,57 @@
+"""Damage tracking for the dirty-rectangle render mode."""
+import threading
+
+import pygame
+
+from .scheduler import scheduler
+
+
+class DamageTracker:
+    """Collects the screen regions that changed since the last frame.
+    Drawables add their old and new rects when they change, the main loop
+    repaints only those regions and hands them to pygame.display.update().
+    """
+    def __init__(self, screen_rect=(0, 0, 320, 240), max_rects=16):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.max_rects = max_rects  # above this, repainting the whole screen is cheaper
+        self.rects = []
+        self.full = True
+        self.lock = threading.Lock()
+
+    def __bool__(self):
+        return self.full or bool(self.rects)
+
+    def add(self, rect):
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width and rect.height:
+            with self.lock:
+                self.rects.append(rect)
+            if threading.current_thread() is not threading.main_thread():
+                scheduler.wake()
+
+    def invalidate(self):
+        """Mark the whole screen as changed, e.g. when switching apps."""
+        with self.lock:
+            self.full = True
+
+    def pop(self):
+        """Return the merged list of changed rects and reset the tracker."""
+        with self.lock:
+            rects, full = self.rects, self.full
+            self.rects, self.full = [], False
+        if full:
+            return [self.screen_rect.copy()]
+        merged = []
+        for rect in rects:
+            # absorb every already merged rect that overlaps the new one
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        if len(merged) > self.max_rects:
+            return [self.screen_rect.copy()]
+        return merged
+
+
+damage = DamageTracker()
@@ -0,0 +1,181 @@
+"""Timing for the main loop: when it has to run a frame and when timed events are due."""
+import heapq
+import itertools
+import threading
+import time
+
+import pygame
+
+WAKE_EVENT = pygame.USEREVENT + 1
+
+
+class FrameScheduler:
+    """Blocks the main loop on input until a frame has to be drawn.
+    Drawables that change with time (clocks, stopwatches) request their next
+    wake-up with wake_at() or wake_in(). Other threads call wake() after they
+    queued an event or changed a drawable.
+    """
+    def __init__(self):
+        self.deadlines = []  # heap of wake-up times, as returned by time.time()
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.wake_posted = False
+        self.reset_stats()
+
+    def wake_at(self, when):
+        """Make sure a frame is run at time 'when' (in seconds since the epoch)."""
+        with self.lock:
+            if when in self.pending:
+                return
+            self.pending.add(when)
+            heapq.heappush(self.deadlines, when)
+        if threading.current_thread() is not threading.main_thread():
+            self.wake()
+
+    def wake_in(self, seconds):
+        self.wake_at(time.time() + seconds)
+
+    def forget(self, when):
+        """Don't wake up at time 'when' after all, e.g. because the timer for it was cancelled."""
+        with self.lock:
+            if when not in self.pending:
+                return
+            self.pending.discard(when)
+            self.deadlines.remove(when)
+            heapq.heapify(self.deadlines)
+
+    def wake(self):
+        """Interrupt wait(). Safe to call from any thread."""
+        with self.lock:
+            if self.wake_posted or not pygame.display.get_init():
+                return
+            self.wake_posted = True
+        pygame.event.post(pygame.event.Event(WAKE_EVENT))
+
+    def next_deadline(self):
+        with self.lock:
+            return self.deadlines[0] if self.deadlines else None
+
+    def pop_due(self, now):
+        """Forget every deadline that has passed, return whether there were any."""
+        due = False
+        with self.lock:
+            while self.deadlines and self.deadlines[0] <= now:
+                self.pending.discard(heapq.heappop(self.deadlines))
+                due = True
+        return due
+
+    def wait(self, busy=False, deadlines=True):
+        """Block until input arrives, another thread calls wake() or the next deadline passes.
+        Returns immediately if busy is true, which the main loop passes when
+        events are queued or parts of the screen are damaged.
+        If deadlines is false, only input and wake() end the wait (e.g. in sleep mode).
+        """
+        now = time.time()
+        if self.pop_due(now) and deadlines:
+            return
+        if busy:
+            return
+        deadline = self.next_deadline() if deadlines else None
+        if deadline is not None:
+            pygame.time.set_timer(WAKE_EVENT, max(1, int((deadline - now) * 1000)))
+        event = pygame.event.wait()
+        if deadline is not None:
+            pygame.time.set_timer(WAKE_EVENT, 0)
+        if event.type not in (WAKE_EVENT, pygame.NOEVENT):
+            # leave input for Eventqueue.handle_events, in front of the events that arrived after it
+            for queued in [event] + pygame.event.get():
+                if queued.type != WAKE_EVENT:
+                    pygame.event.post(queued)
+        # clear before resetting the flag, so a wake() in between is not lost
+        pygame.event.clear(WAKE_EVENT)
+        with self.lock:
+            self.wake_posted = False
+        self.pop_due(time.time())
+        self.idle_time += time.time() - now
+        self.wakeups += 1
+
+    def reset_stats(self):
+        self.stats_start = time.time()
+        self.idle_time = 0
+        self.wakeups = 0
+
+    def stats(self):
+        elapsed = max(time.time() - self.stats_start, 1e-9)
+        return dict(
+            idle_percentage=100 * self.idle_time / elapsed,
+            wakeups_per_second=self.wakeups / elapsed
+        )
+
+
+scheduler = FrameScheduler()
+
+
+class Timer:
+    """Handle for an event scheduled with TimerWheel.schedule()."""
+    def __init__(self, deadline, make_event, interval=None):
+        self.deadline = deadline
+        self.make_event = make_event
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        scheduler.forget(self.deadline)
+
+
+class TimerWheel:
+    """Heap of timed events, serviced by the main loop with pop_due() every frame.
+    No threads are used. Every deadline is also passed to scheduler.wake_at(),
+    so an idle main loop wakes up in time. Repeating timers keep their phase:
+    when frames are late, missed intervals are skipped instead of piling up.
+    """
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()  # keeps timers with equal deadlines in order
+        self.lock = threading.Lock()
+
+    def schedule(self, delay, make_event, interval=None):
+        timer = Timer(time.time() + delay, make_event, interval)
+        self.push(timer)
+        return timer
+
+    def push(self, timer):
+        with self.lock:
+            heapq.heappush(self.heap, (timer.deadline, next(self.counter), timer))
+        scheduler.wake_at(timer.deadline)
+
+    def pop_due(self, now=None):
+        """Return the events of all timers whose deadline has passed, in order."""
+        now = time.time() if now is None else now
+        events = []
+        repeating = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                timer = heapq.heappop(self.heap)[2]
+                if timer.cancelled:
+                    continue
+                events.append(timer.make_event())
+                if timer.interval:
+                    missed = (now - timer.deadline) // timer.interval
+                    timer.deadline += (missed + 1) * timer.interval
+                    repeating.append(timer)
+        for timer in repeating:
+            self.push(timer)
+        return events
+
+    def next_deadline(self):
+        with self.lock:
+            while self.heap and self.heap[0][2].cancelled:
+                heapq.heappop(self.heap)
+            return self.heap[0][0] if self.heap else None
+
+    def seconds_until_next(self, now=None):
+        """How long the main loop may sleep before the next timer is due, None if there is none."""
+        deadline = self.next_deadline()
+        if deadline is None:
+            return None
+        return max(0, deadline - (time.time() if now is None else now))
+
+
+timers = TimerWheel()
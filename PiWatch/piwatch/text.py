@@ -1,8 +1,204 @@
 """This file provides the text classes for PiWatch-apps."""
 import time
-import os
+from collections import OrderedDict
 import pygame.freetype
 from .drawable import *
+from .cache import SurfaceCache
+from .fonts import fonts
+from .scheduler import scheduler
+
+# rendered text surfaces, shared by all Text objects. Resize with text_cache.resize(max_bytes)
+text_cache = SurfaceCache(max_bytes=2 * 1024 * 1024)
+
+
+class LineBreaker:
+    """Breaks text into lines that fit a width, measured with the advances of the glyphs of a font.
+    The advance of every character is asked from freetype once per font and size, so breaking never
+    renders a line. The lines of the last max_entries texts are cached.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.advances = {}  # (font, size) -> {character: advance in pixels}
+        self.breaks = OrderedDict()  # (message, width, font, size, max_lines, ellipsis) -> ((line, width), ...)
+        self.hits = 0
+        self.misses = 0
+
+    def measure(self, font, size, text):
+        """The width of text in pixels, as freetype lays it out without kerning."""
+        advances = self.advances.setdefault((font, size), {})
+        missing = set(text).difference(advances)
+        if missing:
+            pyfont = fonts.get(font, size)
+            missing = ''.join(missing)
+            for character, metrics in zip(missing, pyfont.get_metrics(missing)):
+                advances[character] = metrics[4] if metrics else 0
+        return sum(advances[character] for character in text)
+
+    def lines(self, message, width, font, size, max_lines=None, ellipsis='…'):
+        """The lines of message as ((line, width), ...). Lines break at spaces and newlines, words longer
+        than width are broken anywhere. Text after max_lines is cut off and replaced by ellipsis.
+        """
+        key = (message, width, font, size, max_lines, ellipsis)
+        lines = self.breaks.get(key)
+        if lines is not None:
+            self.hits += 1
+            self.breaks.move_to_end(key)
+            return lines
+        self.misses += 1
+        lines = self.break_lines(message, width, font, size, max_lines, ellipsis)
+        self.breaks[key] = lines
+        if len(self.breaks) > self.max_entries:
+            self.breaks.popitem(last=False)
+        return lines
+
+    def break_lines(self, message, width, font, size, max_lines, ellipsis):
+        space = self.measure(font, size, ' ')
+        lines = []
+        for paragraph in message.split('\n'):
+            line, line_width = '', 0
+            for word in paragraph.split(' '):
+                word_width = self.measure(font, size, word)
+                if line and line_width + space + word_width <= width:
+                    line, line_width = line + ' ' + word, line_width + space + word_width
+                    continue
+                if line:
+                    lines.append((line, line_width))
+                while word_width > width and len(word) > 1:  # too long for a line of its own
+                    cut = self.fit(font, size, word, width)
+                    lines.append((word[:cut], self.measure(font, size, word[:cut])))
+                    word = word[cut:]
+                    word_width = self.measure(font, size, word)
+                line, line_width = word, word_width
+                if max_lines and len(lines) > max_lines:
+                    break
+            lines.append((line, line_width))
+            if max_lines and len(lines) > max_lines:
+                break
+        if max_lines and len(lines) > max_lines:
+            lines[max_lines - 1:] = [self.shorten(font, size, lines[max_lines - 1][0], width, ellipsis)]
+        return tuple(lines)
+
+    def fit(self, font, size, text, width):
+        """The number of characters of text that fit in width, at least one."""
+        line_width = 0
+        for index, character in enumerate(text):
+            line_width += self.measure(font, size, character)
+            if line_width > width:
+                return max(1, index)
+        return len(text)
+
+    def shorten(self, font, size, line, width, ellipsis):
+        """line with ellipsis appended, cut so that both fit in width."""
+        if self.measure(font, size, ellipsis) == 0 and ellipsis:  # the font doesn't have the character
+            ellipsis = '...'
+        cut = self.fit(font, size, line, width - self.measure(font, size, ellipsis))
+        line = line[:cut].rstrip() + ellipsis
+        return line, self.measure(font, size, line)
+
+    def clear(self):
+        self.advances.clear()
+        self.breaks.clear()
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, entries=len(self.breaks), fonts=len(self.advances))
+
+
+line_breaker = LineBreaker()
+
+
+class GlyphStrip:
+    """The glyphs of a font, size and color, rendered once side by side into one surface.
+    compose() builds a string by blitting its glyphs from the strip, with the same layout
+    freetype uses for Text plus the kerning of the font. Characters that are not in the strip
+    yet are added the first time they are used.
+    """
+    def __init__(self, font, size, color, antialias=True, characters='0123456789:'):
+        self.font = font
+        self.size = size
+        self.color = color
+        self.antialias = antialias
+        self.surface = None
+        self.glyphs = {}  # character -> (area in the surface, (left bearing, top bearing), advance)
+        self.kerning = {}  # (left, right) -> pixels to move right by
+        self.renders = 0
+        self.add(characters)
+
+    def add(self, characters):
+        pyfont = fonts.get(self.font, self.size)
+        pyfont.antialiased = self.antialias
+        new = [character for character in dict.fromkeys(characters) if character not in self.glyphs]
+        if not new:
+            return
+        rendered = [pyfont.render(character, self.color) for character in new]
+        self.renders += len(new)
+        x = self.surface.get_width() if self.surface else 0
+        height = max([surface.get_height() for surface, rect in rendered] +
+                     ([self.surface.get_height()] if self.surface else []))
+        strip = pygame.Surface((x + sum(surface.get_width() for surface, rect in rendered), max(1, height)),
+                               pygame.SRCALPHA)
+        if self.surface:
+            strip.blit(self.surface, (0, 0))
+        for character, (surface, rect), metrics in zip(new, rendered, pyfont.get_metrics(''.join(new))):
+            strip.blit(surface, (x, 0))
+            self.glyphs[character] = (pygame.Rect(x, 0, surface.get_width(), surface.get_height()),
+                                      (rect.x, rect.y), metrics[4] if metrics else 0)
+            x += surface.get_width()
+        self.surface = strip.convert_alpha()
+
+    def kern(self, left, right):
+        pair = (left, right)
+        if pair not in self.kerning:
+            pyfont = fonts.get(self.font, self.size)
+            pyfont.kerning = True
+            try:
+                kerned = pyfont.get_rect(left + right).width
+            finally:
+                pyfont.kerning = False
+            self.kerning[pair] = kerned - pyfont.get_rect(left + right).width
+        return self.kerning[pair]
+
+    def compose(self, text):
+        """A new surface with text, the size freetype would render it at."""
+        self.add(text)
+        placed = []  # (area, x, top bearing) of every glyph
+        pen, left, right, top, bottom = 0, None, None, None, None
+        for index, character in enumerate(text):
+            if index:
+                pen += self.kern(text[index - 1], character)
+            area, (bearing_x, bearing_y), advance = self.glyphs[character]
+            x = round(pen) + bearing_x
+            if area.height:
+                placed.append((area, x, bearing_y))
+                top = bearing_y if top is None else max(top, bearing_y)
+                bottom = bearing_y - area.height if bottom is None else min(bottom, bearing_y - area.height)
+                end = x + area.width
+            else:  # whitespace takes up its advance
+                x, end = round(pen), round(pen + advance)
+            left = x if left is None else min(left, x)
+            right = end if right is None else max(right, end)
+            pen += advance
+        if top is None:  # only whitespace, which freetype renders without height, or no text
+            top, bottom = (0, 0) if text else (fonts.get(self.font, self.size).get_sized_height(), 0)
+        image = pygame.Surface(((right - left) if text else 0, top - bottom), pygame.SRCALPHA)
+        for area, x, bearing_y in placed:
+            image.blit(self.surface, (x - left, top - bearing_y), area)
+        return image
+
+
+glyph_strips = {}  # (font, size, color, antialias) -> GlyphStrip, shared by all NumericText objects
+
+
+def glyph_strip(font, size, color, antialias=True, characters='0123456789:'):
+    key = (font, size, tuple(color), antialias)
+    if key not in glyph_strips:
+        glyph_strips[key] = GlyphStrip(font, size, tuple(color), antialias, characters)
+    return glyph_strips[key]
+
+
+def next_minute():
+    """The time at which the next minute starts, for scheduler.wake_at()."""
+    now = time.time()
+    return now - now % 60 + 60
 
 
 class Text(Drawable):
@@ -11,29 +207,77 @@ class Text(Drawable):
         size=20,
         color=(255, 255, 255),
         font='Roboto-Regular',
-        message='Example Text'
+        message='Example Text',
+        antialias=True
     )
 
-    def setup(self, parent):
-        try:
-            self.pyfont = pygame.freetype.Font(
-                os.path.join(os.getcwd(), 'resources', 'fonts', self.font + '.ttf'), self.size)
-        except OSError:
-            self.pyfont = pygame.freetype.SysFont(self.font, self.size)
-        super().setup(parent)
+    def render_image(self):
+        self.pyfont = fonts.get(self.font, self.size)
+        key = (self.font, self.size, tuple(self.color), self.message, self.antialias)
+        self.image = text_cache.get(key)
+        if self.image is None:
+            self.pyfont.antialiased = self.antialias
+            self.image = text_cache.put(key, self.pyfont.render(self.message, self.color)[0].convert_alpha())
+
+
+class Paragraph(Text):
+    """Text broken into lines of at most width pixels, rendered into a single surface.
+    With max_lines, the text that doesn't fit is replaced by ellipsis.
+    """
+    DEFAULTATTRS = dict(
+        Text.DEFAULTATTRS,
+        width=250,
+        max_lines=None,
+        ellipsis='…',
+        line_spacing=2,
+        align='left'  # 'left', 'center' or 'right'
+    )
 
     def render_image(self):
+        self.pyfont = fonts.get(self.font, self.size)
+        key = ('paragraph', self.font, self.size, tuple(self.color), self.message, self.antialias, self.width,
+               self.max_lines, self.ellipsis, self.line_spacing, self.align)
+        self.image = text_cache.get(key)
+        if self.image is None:
+            self.image = text_cache.put(key, self.render_lines(
+                line_breaker.lines(self.message, self.width, self.font, self.size, self.max_lines, self.ellipsis)))
+
+    def render_lines(self, lines):
+        line_height = self.pyfont.get_sized_height() + self.line_spacing
+        ascender = self.pyfont.get_sized_ascender()
+        image = pygame.Surface((max(1, int(max(width for line, width in lines) + 0.5)),
+                                line_height * len(lines) - self.line_spacing), pygame.SRCALPHA)
+        self.pyfont.antialiased = self.antialias
+        self.pyfont.origin = True  # render_to() places the baseline at the given position
         try:
-            self.pyfont = pygame.freetype.Font(
-                os.path.join(os.getcwd(), 'resources', 'fonts', self.font + '.ttf'), self.size)
-        except OSError:
-            self.pyfont = pygame.freetype.SysFont(self.font, self.size)
-        self.image = self.pyfont.render(self.message, self.color)[0].convert_alpha()
+            for number, (line, width) in enumerate(lines):
+                if not line:
+                    continue
+                x = {'left': 0, 'center': (image.get_width() - width) / 2, 'right': image.get_width() - width}
+                self.pyfont.render_to(image, (int(x[self.align]), number * line_height + ascender), line, self.color)
+        finally:
+            self.pyfont.origin = False
+        return image.convert_alpha()
 
 
-class Clock(Text):
+class NumericText(Text):
+    """Text that changes often, like a clock or a counter. Instead of rendering the message with freetype,
+    it is composed from a GlyphStrip: a few blits per change. 'characters' are rendered into the strip up front.
+    """
     DEFAULTATTRS = dict(
         Text.DEFAULTATTRS,
+        characters='0123456789:'
+    )
+
+    def render_image(self):
+        self.pyfont = fonts.get(self.font, self.size)
+        self.image = glyph_strip(self.font, self.size, self.color, self.antialias, self.characters).compose(
+            self.message)
+
+
+class Clock(NumericText):
+    DEFAULTATTRS = dict(
+        NumericText.DEFAULTATTRS,
         twentyfour=False,
         separator=':'
     )
@@ -42,14 +286,14 @@ class Clock(Text):
         super().__init__(*attrs, **kwargs)
         self.time = None
 
-    def draw(self, surface):
+    def refresh(self):
         """Called every frame"""
         if self.time != time.localtime()[3:5]:
             self.time = time.localtime()[3:5]
             hours = str(self.time[0]) if self.twentyfour else str(self.time[0] % 12)
             minutes = str(self.time[1]) if len(str(self.time[1])) > 1 else '0' + str(self.time[1])
             self.update(message=hours+self.separator+minutes)
-        super().draw(surface)
+        scheduler.wake_at(next_minute())
 
 
 class TextCursor(Text):  # just for testing. Provides a cursor when pygame.mouse.get_visible == False
@@ -74,9 +318,9 @@ class Date(Text):
         self.time = (newtime[2], newtime[1])
         self.update(message=time.strftime("%A, %d %B", newtime))
 
-    def draw(self, surface):
+    def refresh(self):
         newtime = time.localtime()
         if self.time[0] != newtime[2] or self.time[1] != newtime[1]:
             self.time = (newtime[2], newtime[1])
             self.update(message=time.strftime("%A, %d %B", newtime))
-        super().draw(surface)
+        scheduler.wake_at(next_minute())
@@ -1,22 +1,202 @@
+"""Runs functions on a shared pool of worker threads."""
+import collections
+import concurrent.futures
+import queue
 import threading
+import time
+import traceback
 
+from .event import Event
 
-def threaded(func):
-    """A decorator which converts a function to a ThreadedFunction."""
-    func_thread = ThreadedFunction(target=func)
-    return func_thread
+
+def run_task(future, func, args, kwargs):
+    """Call func and store its result or exception in future, unless the future was cancelled."""
+    if future.set_running_or_notify_cancel():
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as exception:
+            traceback.print_exc()
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+class WorkerPool:
+    """A pool of at most 'size' daemon threads which are started when needed, for tasks that end.
+    Daemon threads are used, so a task that hangs doesn't keep the PiWatch from exiting.
+    """
+    def __init__(self, size=4):
+        self.size = size
+        self.tasks = queue.Queue()
+        self.lock = threading.Lock()
+        self.workers = 0
+        self.idle = 0
+        self.active = 0
+        self.completed = 0
+        self.total_wait = 0.0  # seconds between submitting and starting tasks
+        self.max_wait = 0.0
+        self.total_run = 0.0
+
+    def run(self, future, func, args=(), kwargs=None, done=None):
+        """Run func in a worker and store its outcome in future. done() is called afterwards,
+        also when the future was cancelled before it started."""
+        self.tasks.put((future, func, args, kwargs or {}, done, time.perf_counter()))
+        with self.lock:
+            if self.tasks.qsize() <= self.idle or self.workers >= self.size:
+                return
+            self.workers += 1
+        worker = threading.Thread(target=self.work, name='piwatch worker {}'.format(self.workers))
+        worker.daemon = True
+        worker.start()
+
+    def submit(self, func, *args, **kwargs):
+        future = concurrent.futures.Future()
+        self.run(future, func, args, kwargs)
+        return future
+
+    def work(self):
+        while True:
+            with self.lock:
+                self.idle += 1
+            future, func, args, kwargs, done, submitted = self.tasks.get()
+            started = time.perf_counter()
+            with self.lock:
+                self.idle -= 1
+                self.active += 1
+                self.total_wait += started - submitted
+                self.max_wait = max(self.max_wait, started - submitted)
+            try:
+                run_task(future, func, args, kwargs)
+            finally:
+                with self.lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self.total_run += time.perf_counter() - started
+                if done:
+                    done()
+
+    def stats(self):
+        with self.lock:
+            completed = max(self.completed, 1)
+            return dict(
+                queue_depth=self.tasks.qsize(),
+                active_workers=self.active,
+                workers=self.workers,
+                size=self.size,
+                completed=self.completed,
+                average_wait=self.total_wait / completed,
+                max_wait=self.max_wait,
+                average_run=self.total_run / completed
+            )
+
+
+worker_pool = WorkerPool()
+
+
+class DedicatedThreads:
+    """Runs every task on a new daemon thread, for loops that last as long as a connection.
+    Those would hold a worker of the pool all that time and make short tasks wait.
+    Has the run() and submit() of WorkerPool, so it can be passed as pool to @threaded.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.started = 0
+
+    def run(self, future, func, args=(), kwargs=None, done=None):
+        with self.lock:
+            self.started += 1
+        thread = threading.Thread(target=self.work, args=(future, func, args, kwargs or {}, done),
+                                  name='piwatch {}'.format(getattr(func, '__name__', 'thread')))
+        thread.daemon = True
+        thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        future = concurrent.futures.Future()
+        self.run(future, func, args, kwargs)
+        return future
+
+    def work(self, future, func, args, kwargs, done):
+        with self.lock:
+            self.active += 1
+        try:
+            run_task(future, func, args, kwargs)
+        finally:
+            with self.lock:
+                self.active -= 1
+            if done:
+                done()
+
+    def stats(self):
+        with self.lock:
+            return dict(active_threads=self.active, started=self.started)
+
+
+dedicated_threads = DedicatedThreads()
+
+
+def threaded(func=None, limit=None, pool=None):
+    """A decorator which converts a function to a ThreadedFunction.
+    Use it as @threaded, or as @threaded(limit=1) to run at most one call at a time.
+    Functions that run as long as a connection use @threaded(pool=dedicated_threads).
+    """
+    if func is None:
+        return lambda func: ThreadedFunction(target=func, limit=limit, pool=pool)
+    return ThreadedFunction(target=func, limit=limit, pool=pool)
 
 
 class ThreadedFunction:
-    """A thread which calls a function every time it is called."""
-    def __init__(self, target=None, *args, **kwargs):
+    """A function which runs in the worker pool every time it is called.
+    Calling it returns a concurrent.futures.Future. Calls that wait for a free slot
+    (because of the pool size or the limit of this function) can be cancelled with
+    future.cancel() or cancel_waiting().
+    """
+    def __init__(self, target=None, limit=None, pool=None):
         self.target = target
-        self.args = args
-        self.kwargs = kwargs
+        self.limit = limit
+        self.pool = pool or worker_pool
+        self.lock = threading.Lock()
+        self.running = 0
+        self.waiting = collections.deque()
 
     def __call__(self, *args, **kwargs):
-        self.args = args
-        self.kwargs = kwargs
-        self.thread = threading.Thread(target=self.target, args=self.args, kwargs=self.kwargs)
-        self.thread.daemon = True
-        self.thread.start()
+        future = concurrent.futures.Future()
+        with self.lock:
+            if self.limit is not None and self.running >= self.limit:
+                self.waiting.append((future, args, kwargs))
+                return future
+            self.running += 1
+        self.pool.run(future, self.target, args, kwargs, done=self.finished)
+        return future
+
+    def finished(self):
+        with self.lock:
+            while self.waiting:
+                future, args, kwargs = self.waiting.popleft()
+                if not future.cancelled():
+                    break
+            else:
+                self.running -= 1
+                return
+        self.pool.run(future, self.target, args, kwargs, done=self.finished)
+
+    def cancel_waiting(self):
+        with self.lock:
+            for future, args, kwargs in self.waiting:
+                future.cancel()
+            self.waiting.clear()
+
+
+def post_result(future, eventqueue, tag):
+    """Add Event(tag) with the result of future as data to eventqueue when it is done.
+    If the function raised an exception, Event(tag + ' failed') with the exception is added instead.
+    """
+    def done(future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            eventqueue.add(Event(tag + ' failed', data=future.exception()))
+        else:
+            eventqueue.add(Event(tag, data=future.result()))
+    future.add_done_callback(done)
+    return future
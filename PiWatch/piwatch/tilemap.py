@@ -0,0 +1,127 @@
+"""This file provides the TileMap class, a board of equally sized tiles for games like Snake or Minesweeper."""
+import pygame
+
+from .drawable import *
+from .fonts import fonts
+from .render import damage
+
+
+class TileMap(Drawable):
+    """A board of columns x rows tiles drawn as one surface.
+    Every tile has an id from 0 to 255. The palette maps ids to what is drawn:
+    a color, a (color, label) tuple or a pygame.Surface of tile_size.
+    Only the tiles changed with set_tile() are drawn again, the rest of the board is kept.
+    """
+    DEFAULTATTRS = dict(
+        Drawable.DEFAULTATTRS,
+        columns=10,
+        rows=10,
+        tile_size=20,
+        spacing=0,
+        palette={0: (0, 0, 0)},
+        font='Roboto-Regular',
+        size=20,
+        color=(255, 255, 255)  # the color of labels
+    )
+    TILEATTRS = {'columns', 'rows', 'tile_size', 'spacing', 'palette', 'font', 'size', 'color'}
+
+    def __init__(self, *attrs, **kwargs):
+        super().__init__(*attrs, **kwargs)
+        if type(self.tile_size) is int:
+            self.tile_size = (self.tile_size, self.tile_size)
+        self.tiles = bytearray(self.columns * self.rows)
+
+    def apply_update(self, kwargs):
+        if self.TILEATTRS.isdisjoint(kwargs.keys()):
+            super().apply_update(kwargs)
+            return
+        self.set_attrs(kwargs)
+        if type(self.tile_size) is int:
+            self.tile_size = (self.tile_size, self.tile_size)
+        if len(self.tiles) != self.columns * self.rows:
+            self.tiles = bytearray(self.columns * self.rows)
+        self.full_render()
+
+    def render_atlas(self):
+        """Draw every tile in the palette once, side by side on one surface."""
+        width, height = self.tile_size
+        self.atlas = pygame.Surface((width * (max(self.palette) + 1), height), pygame.SRCALPHA).convert_alpha()
+        self.atlas.fill((0, 0, 0, 0))
+        self.areas = {}
+        pyfont = fonts.get(self.font, self.size)
+        for tile_id, tile in self.palette.items():
+            area = pygame.Rect(tile_id * width, 0, width, height)
+            self.areas[tile_id] = area
+            if isinstance(tile, pygame.Surface):
+                self.atlas.blit(tile, area)
+                continue
+            if isinstance(tile[0], (tuple, list)):
+                tile, label = tile
+            else:
+                label = None
+            self.atlas.fill(tile, area)
+            if label:
+                text, text_rect = pyfont.render(label, self.color)
+                text_rect.center = area.center
+                self.atlas.blit(text, text_rect)
+
+    def render_image(self):
+        self.render_atlas()
+        width, height = self.tile_size
+        self.image = pygame.Surface(
+            (self.columns * (width + self.spacing) - self.spacing, self.rows * (height + self.spacing) - self.spacing),
+            pygame.SRCALPHA
+        ).convert_alpha()
+        self.image.fill((0, 0, 0, 0))
+        for y in range(self.rows):
+            for x in range(self.columns):
+                self.blit_tile(x, y)
+
+    def create_fg_surf(self):
+        # the color attribute is used for labels, the image itself is never tinted
+        self.fg_surf = self.image
+
+    def tile_rect(self, x, y):
+        """The rect of tile (x, y) on self.image."""
+        width, height = self.tile_size
+        return pygame.Rect(x * (width + self.spacing), y * (height + self.spacing), width, height)
+
+    def blit_tile(self, x, y):
+        rect = self.tile_rect(x, y)
+        area = self.areas.get(self.tiles[y * self.columns + x])
+        self.image.fill((0, 0, 0, 0), rect)
+        if area:
+            self.image.blit(self.atlas, rect, area)
+
+    def get_tile(self, x, y):
+        return self.tiles[y * self.columns + x]
+
+    def set_tile(self, x, y, tile_id):
+        index = y * self.columns + x
+        if self.tiles[index] == tile_id:
+            return
+        self.tiles[index] = tile_id
+        if self.image:
+            self.blit_tile(x, y)
+            if hasattr(self, 'fg_rect'):
+                damage.add(self.tile_rect(x, y).move(self.fg_rect.topleft))
+
+    def fill(self, tile_id):
+        """Set every tile to tile_id."""
+        self.tiles[:] = bytes([tile_id]) * len(self.tiles)
+        if self.image:
+            for y in range(self.rows):
+                for x in range(self.columns):
+                    self.blit_tile(x, y)
+            self.mark_dirty()
+
+    def tile_at(self, pos):
+        """The (x, y) of the tile at screen position pos, None if pos is not on a tile."""
+        if not hasattr(self, 'fg_rect') or not self.fg_rect.collidepoint(pos):
+            return None
+        width, height = self.tile_size
+        x, x_offset = divmod(pos[0] - self.fg_rect.left, width + self.spacing)
+        y, y_offset = divmod(pos[1] - self.fg_rect.top, height + self.spacing)
+        if x_offset >= width or y_offset >= height:
+            return None  # on the spacing between tiles
+        return x, y
@@ -0,0 +1,256 @@
+"""The connections the bluetooth service waits for the phone on. On the watch that is RFCOMM,
+on a computer a TCP or Unix domain socket stands in for it, so the phone link can be tested
+without a Pi or a paired phone. The PIWATCH_BT_TRANSPORT environment variable selects one:
+    rfcomm                  (default)
+    tcp, tcp:PORT, tcp:HOST, tcp:HOST:PORT
+    unix, unix:PATH
+"""
+import collections
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from .protocol import encode_message
+
+TRANSPORT_VARIABLE = 'PIWATCH_BT_TRANSPORT'
+DEFAULT_TCP_ADDRESS = ('127.0.0.1', 8765)
+DEFAULT_UNIX_PATH = '/tmp/piwatch-bt.sock'
+
+
+def close_socket(sock):
+    """Close sock, waking up threads that are blocked in accept() or recv() on it."""
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    sock.close()
+
+
+class SendQueue:
+    """Messages for the phone. The main loop adds them with put(), the writer thread of the
+    connection sends them with sendall() in run(), so no frame waits for the radio.
+    A message that is equal to one that is still queued is coalesced with it.
+    When 'capacity' messages are queued, the overflow policy decides what happens:
+        'drop-oldest': the oldest queued message is dropped
+        'drop-newest': the new message is dropped
+        'block': the adding thread waits for the writer (the main thread never waits, it drops the new message)
+    sent(message, seconds since put) or failed(message, reason) is called once for every message.
+    """
+    OVERFLOW_POLICIES = ('drop-oldest', 'drop-newest', 'block')
+
+    def __init__(self, sent, failed, capacity=64, overflow='drop-oldest'):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError("Overflow policy must be one of {}, it was {}".format(self.OVERFLOW_POLICIES, overflow))
+        self.sent = sent
+        self.failed = failed
+        self.capacity = capacity
+        self.overflow = overflow
+        self.queue = collections.OrderedDict()  # frame -> (message, time.perf_counter() of put)
+        self.condition = threading.Condition()
+        self.closed = False
+        self.sent_count = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def put(self, message):
+        frame = encode_message(message)
+        dropped = None
+        with self.condition:
+            if frame in self.queue:
+                self.coalesced += 1
+                return
+            if self.overflow == 'block' and threading.current_thread() is not threading.main_thread():
+                while len(self.queue) >= self.capacity and not self.closed:
+                    self.condition.wait(0.1)
+            if self.closed:
+                dropped = (message, 'not connected')
+            elif len(self.queue) < self.capacity:
+                self.queue[frame] = (message, time.perf_counter())
+                self.condition.notify_all()
+            else:
+                self.dropped += 1
+                if self.overflow == 'drop-oldest':
+                    dropped = self.queue.popitem(last=False)[1][0], 'send queue full'
+                    self.queue[frame] = (message, time.perf_counter())
+                else:
+                    dropped = (message, 'send queue full')
+        if dropped:
+            self.failed(*dropped)
+
+    def run(self, sock):
+        """Send the queued messages until close() is called or sending fails. Runs in the writer thread."""
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+                batch = list(self.queue.items())
+                self.queue.clear()
+                self.condition.notify_all()
+            try:
+                sock.sendall(b''.join(frame for frame, queued in batch))
+            except OSError as error:
+                for frame, (message, queued) in batch:
+                    self.failed(message, str(error))
+                self.close()
+                return
+            now = time.perf_counter()
+            self.sent_count += len(batch)
+            for frame, (message, queued) in batch:
+                self.sent(message, now - queued)
+
+    def close(self, reason='connection closed'):
+        """Stop the writer and fail the messages that were not sent."""
+        with self.condition:
+            self.closed = True
+            pending = [message for message, queued in self.queue.values()]
+            self.queue.clear()
+            self.condition.notify_all()
+        for message in pending:
+            self.failed(message, reason)
+
+    def stats(self):
+        with self.condition:
+            return dict(queued=len(self.queue), sent=self.sent_count, dropped=self.dropped, coalesced=self.coalesced)
+
+
+class Transport:
+    """Listens for one phone. listen() opens the server socket and accept() blocks until the phone
+    connects, returning the connected socket and a name for the phone. close() makes accept() raise OSError.
+    """
+    def __init__(self):
+        self.sock = None
+
+    def listen(self):
+        raise NotImplementedError()
+
+    def accept(self):
+        client_sock, address = self.sock.accept()
+        return client_sock, self.peer_name(address)
+
+    def peer_name(self, address):
+        return str(address)
+
+    def connect(self):
+        """A socket connected to this transport, like the phone would have."""
+        raise NotImplementedError()
+
+    def close(self):
+        if self.sock:
+            close_socket(self.sock)
+            self.sock = None
+
+
+class RfcommTransport(Transport):
+    """Bluetooth RFCOMM, advertised as a serial port service the PiWatch Android app looks for."""
+    UUID = "bcfa2015-0e37-429b-8907-5b434f9b9093"
+    SERVICE_NAME = "PiWatch Android Connection Service"
+
+    def listen(self):
+        import bluetooth  # pybluez, only on the watch
+        if sys.platform == 'linux':
+            # saves users the horrible pain of making their device discoverable
+            code = subprocess.call(['sudo', 'hciconfig', 'hci0', 'piscan'])
+            if not code:
+                print("enabled bluetooth")
+            else:
+                print("failed to enable bluetooth")
+        self.sock = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
+        self.sock.bind(("", 0))
+        self.sock.listen(1)
+        bluetooth.advertise_service(self.sock, self.SERVICE_NAME,
+                                    service_id=self.UUID,
+                                    service_classes=[self.UUID, bluetooth.SERIAL_PORT_CLASS],
+                                    profiles=[bluetooth.SERIAL_PORT_PROFILE])
+        print("Advertising bt service: ", self.SERVICE_NAME)
+
+    def peer_name(self, address):
+        import bluetooth
+        print("Accepted connection from ", address[0])
+        return bluetooth.lookup_name(address[0])
+
+    def connect(self):
+        """Connect to the first watch nearby that advertises the service."""
+        import bluetooth
+        services = bluetooth.find_service(uuid=self.UUID)
+        if not services:
+            raise OSError('No PiWatch advertising {!r} was found'.format(self.SERVICE_NAME))
+        sock = bluetooth.BluetoothSocket(bluetooth.RFCOMM)
+        sock.connect((services[0]['host'], services[0]['port']))
+        return sock
+
+
+class TcpTransport(Transport):
+    def __init__(self, host=DEFAULT_TCP_ADDRESS[0], port=DEFAULT_TCP_ADDRESS[1]):
+        super().__init__()
+        self.address = (host, port)
+
+    def listen(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(self.address)
+        self.sock.listen(1)
+        print('Waiting for the phone on tcp:{}:{}'.format(*self.address))
+
+    def peer_name(self, address):
+        return '{}:{}'.format(*address)
+
+    def connect(self):
+        sock = socket.create_connection(self.address)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+
+class UnixTransport(Transport):
+    def __init__(self, path=DEFAULT_UNIX_PATH):
+        super().__init__()
+        self.path = path
+
+    def listen(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(self.path)
+        self.sock.listen(1)
+        print('Waiting for the phone on unix:' + self.path)
+
+    def peer_name(self, address):
+        return 'local phone'
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        return sock
+
+    def close(self):
+        super().close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def transport_from_spec(spec):
+    """The Transport for a spec like 'rfcomm', 'tcp:127.0.0.1:8765' or 'unix:/tmp/piwatch-bt.sock'."""
+    kind, _, rest = spec.partition(':')
+    if kind == 'rfcomm' and not rest:
+        return RfcommTransport()
+    if kind == 'tcp':
+        host, port = DEFAULT_TCP_ADDRESS
+        parts = rest.split(':') if rest else []
+        if len(parts) == 1:  # a port or a host
+            port, host = (int(parts[0]), host) if parts[0].isdigit() else (port, parts[0])
+        elif len(parts) == 2 and (parts[1].isdigit() or not parts[1]):
+            host, port = parts[0] or host, int(parts[1]) if parts[1] else port
+        elif parts:
+            raise ValueError('Bluetooth transport {!r} is not tcp[:HOST][:PORT]'.format(spec))
+        return TcpTransport(host, port)
+    if kind == 'unix':
+        return UnixTransport(rest or DEFAULT_UNIX_PATH)
+    raise ValueError('Unknown bluetooth transport {!r}, use rfcomm, tcp[:HOST][:PORT] or unix[:PATH]'.format(spec))
+
+
+def transport_from_env():
+    return transport_from_spec(os.environ.get(TRANSPORT_VARIABLE, 'rfcomm'))